@@ -1,4 +1,6 @@
 import os
+from datetime import timedelta
+from typing import Any, Dict
 
 import sentry_sdk
 from sentry_sdk.integrations.django import DjangoIntegration
@@ -115,6 +117,116 @@ SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY", None)
 
 NOREPLY_EMAIL_ADDRESS = "noreply@yourchangelogs.com"
 
+# release notifications outbox, see the send_notifications command
+NOTIFICATION_BATCH_SIZE = 1000
+# defaults of the channels, SendGrid accepts up to 1000 personalizations
+NOTIFICATION_RECIPIENTS_PER_MESSAGE = 1000
+NOTIFICATION_WORKERS = int(os.getenv("NOTIFICATION_WORKERS", 8))
+NOTIFICATION_MAX_ATTEMPTS = 5
+NOTIFICATION_BACKOFF = timedelta(minutes=1)
+NOTIFICATION_MAX_BACKOFF = timedelta(hours=6)
+# jobs of a worker which died while sending are claimed again after it
+NOTIFICATION_LOCK_TIMEOUT = timedelta(minutes=10)
+
+# every subscriber is notified through each channel, see changelogs/channels.py
+NOTIFICATION_CHANNELS: Dict[str, Dict[str, Any]] = {}
+if SENDGRID_API_KEY and not DEBUG:
+    NOTIFICATION_CHANNELS["email"] = {
+        "BACKEND": "changelogs.channels.SendGridChannel",
+    }
+if os.getenv("NOTIFICATION_WEBHOOK_URL"):
+    NOTIFICATION_CHANNELS["webhook"] = {
+        "BACKEND": "changelogs.channels.WebhookChannel",
+        "OPTIONS": {"url": os.getenv("NOTIFICATION_WEBHOOK_URL")},
+        "WORKERS": int(os.getenv("NOTIFICATION_WEBHOOK_WORKERS", 4)),
+    }
+if os.getenv("NOTIFICATION_SLACK_WEBHOOK_URL"):
+    NOTIFICATION_CHANNELS["slack"] = {
+        "BACKEND": "changelogs.channels.SlackChannel",
+        "OPTIONS": {"url": os.getenv("NOTIFICATION_SLACK_WEBHOOK_URL")},
+        # Slack accepts about one message per second per webhook
+        "WORKERS": 1,
+    }
+# local runs
+if os.getenv("NOTIFICATION_FILE"):
+    NOTIFICATION_CHANNELS["file"] = {
+        "BACKEND": "changelogs.channels.FileChannel",
+        "OPTIONS": {"path": os.getenv("NOTIFICATION_FILE")},
+    }
+if os.getenv("NOTIFICATION_CONSOLE"):
+    NOTIFICATION_CHANNELS["console"] = {
+        "BACKEND": "changelogs.channels.ConsoleChannel",
+        "WORKERS": 1,
+    }
+
+# number of versions per feed page
+FEED_PAGE_SIZE = int(os.getenv("FEED_PAGE_SIZE", 20))
+# number of versions per page of project versions
+PROJECT_VERSIONS_PAGE_SIZE = int(os.getenv("PROJECT_VERSIONS_PAGE_SIZE", 20))
+# seconds shared caches may keep pages of public projects
+PAGE_CACHE_MAX_AGE = int(os.getenv("PAGE_CACHE_MAX_AGE", 60))
+# number of versions in RSS and Atom feeds
+FEED_MAX_ITEMS = int(os.getenv("FEED_MAX_ITEMS", 50))
+
+# "join" reads feeds from versions of the subscribed projects, "timeline"
+# reads them from per-user timeline entries stored on every new version and
+# subscription. Run rebuild_timeline after switching to "timeline".
+FEED_MODE = os.getenv("FEED_MODE", "join")
+
+# secrets of release webhooks
+GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET", "")
+GITLAB_WEBHOOK_TOKEN = os.getenv("GITLAB_WEBHOOK_TOKEN", "")
+
+# outbound HTTP requests
+HTTP_CONNECT_TIMEOUT = 5
+HTTP_READ_TIMEOUT = 30
+HTTP_RETRIES = 3
+HTTP_BACKOFF = 0.5
+HTTP_MAX_BACKOFF = 30
+HTTP_POOL_CONNECTIONS = 10
+HTTP_POOL_SIZE = 10
+
+# fetching of projects changelogs
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", 8))
+FETCH_HOST_CONCURRENCY = {"github.com": 4}
+FETCH_DEFAULT_HOST_CONCURRENCY = 2
+FETCH_CHUNK_SIZE = 500
+FETCH_RELEASES_PAGE_SIZE = 25
+FETCH_MAX_RELEASE_PAGES = 10
+FETCH_GITHUB_BATCH_SIZE = int(os.getenv("FETCH_GITHUB_BATCH_SIZE", 20))
+FETCH_GITHUB_MAX_BATCH_NODES = 1000
+FETCH_GITLAB_BATCH_SIZE = 20
+# GitHub drafts younger than this are fetched again until they are published
+FETCH_DRAFT_MAX_AGE = timedelta(days=30)
+# projects are polled FETCH_POLLS_PER_RELEASE times per their median gap
+# between the last FETCH_CADENCE_RELEASES releases
+FETCH_POLLS_PER_RELEASE = 4
+FETCH_CADENCE_RELEASES = 10
+FETCH_DEFAULT_INTERVAL = timedelta(days=1)
+FETCH_MIN_INTERVAL = timedelta(minutes=10)
+FETCH_MAX_INTERVAL = timedelta(days=7)
+# requests kept in reserve of every token's rate limit
+FETCH_RATE_LIMIT_RESERVE = 50
+# longest wait for a rate limit reset within one run, in seconds
+FETCH_RATE_LIMIT_MAX_WAIT = 900
+
+# rendered version cards are kept in the "fragments" cache, a file based one
+# can be shared by all the processes of the host
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    # cached version cards. The default local memory cache is per process:
+    # with several web processes use a shared backend like memcached, which
+    # the hit ratio of the fragment_cache_stats command needs too.
+    "fragments": {
+        "BACKEND": os.getenv(
+            "FRAGMENT_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("FRAGMENT_CACHE_LOCATION", "fragments"),
+        "TIMEOUT": 7 * 24 * 60 * 60,
+        "OPTIONS": {"MAX_ENTRIES": int(os.getenv("FRAGMENT_CACHE_MAX_ENTRIES", 10000))},
+    },
+}
+
 if DEBUG:
     DATABASES = {
         "default": {
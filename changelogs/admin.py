@@ -1,8 +1,20 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from .models import Project, User, Version
+from .models import (
+    FetchRun,
+    NotificationDelivery,
+    NotificationJob,
+    Project,
+    ProjectFetch,
+    User,
+    Version,
+)
 
 admin.site.register(Project)
 admin.site.register(Version)
 admin.site.register(User, UserAdmin)
+admin.site.register(FetchRun)
+admin.site.register(ProjectFetch)
+admin.site.register(NotificationJob)
+admin.site.register(NotificationDelivery)
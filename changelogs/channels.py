@@ -0,0 +1,237 @@
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, TextIO
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+from sendgrid import SendGridAPIClient
+from sendgrid.helpers.mail import Mail, To
+
+from changelogs.http_client import client
+from changelogs.models import Version
+
+logger = logging.getLogger(__name__)
+
+
+class Notification(NamedTuple):
+    subject: str
+    html: str
+    versions: List[Version]
+    # e-mail addresses of the users it is addressed to, empty for events
+    recipients: List[str]
+
+
+def _version_data(version: Version) -> Dict:
+    return {
+        "project": version.project.title,
+        "project_url": version.project.url,
+        "title": version.title,
+        "date_time": version.date_time.isoformat(),
+    }
+
+
+def notification_data(notification: Notification) -> Dict:
+    # without recipients, which aren't shared with third parties
+    return {
+        "subject": notification.subject,
+        "versions": [_version_data(version) for version in notification.versions],
+    }
+
+
+class NotificationChannel:
+    """
+    Delivers notifications to one destination.
+
+    Backends implement ``send()``, which raises on failure. ``send_many()``
+    sends a batch with up to ``workers`` notifications in flight, so every
+    channel has its own concurrency limit, and returns their errors.
+
+    Channels with ``per_recipient`` notify every subscriber, with up to
+    ``batch_size`` recipients per notification. Other channels post one
+    event per version, without recipients.
+    """
+
+    per_recipient = False
+
+    def __init__(
+        self, workers: Optional[int] = None, batch_size: Optional[int] = None
+    ) -> None:
+        self.workers = workers or settings.NOTIFICATION_WORKERS
+        self.batch_size = batch_size or settings.NOTIFICATION_RECIPIENTS_PER_MESSAGE
+
+    def send(self, notification: Notification) -> None:
+        raise NotImplementedError
+
+    def _send(self, notification: Notification) -> Optional[str]:
+        try:
+            self.send(notification)
+        except Exception as e:
+            logger.warning("Failed to send %r: %s", notification.subject, e)
+            return str(e) or e.__class__.__name__
+        return None
+
+    def send_many(self, notifications: List[Notification]) -> List[Optional[str]]:
+        if len(notifications) <= 1 or self.workers == 1:
+            return [self._send(notification) for notification in notifications]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(self._send, notifications))
+
+
+class SendGridChannel(NotificationChannel):
+    """
+    Sends e-mails through the SendGrid API, reusing one client.
+    """
+
+    per_recipient = True
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.client = SendGridAPIClient(settings.SENDGRID_API_KEY)
+
+    def send(self, notification: Notification) -> None:
+        # a personalization per recipient, so they don't see each other
+        self.client.send(
+            Mail(
+                from_email=settings.NOREPLY_EMAIL_ADDRESS,
+                to_emails=[To(email) for email in notification.recipients],
+                subject=notification.subject,
+                html_content=notification.html,
+                is_multiple=True,
+            )
+        )
+
+
+class WebhookChannel(NotificationChannel):
+    """
+    Posts notifications as JSON to the URL.
+    """
+
+    def __init__(self, url: str, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.url = url
+
+    def payload(self, notification: Notification) -> Dict:
+        return dict(notification_data(notification), html=notification.html)
+
+    def send(self, notification: Notification) -> None:
+        # not retried here, a timed out post may have been received already,
+        # and the outbox retries failed notifications
+        response = client.post(self.url, json=self.payload(notification), retries=0)
+        response.raise_for_status()
+
+
+class SlackChannel(WebhookChannel):
+    """
+    Posts notifications to a Slack incoming webhook.
+    """
+
+    def payload(self, notification: Notification) -> Dict:
+        lines = [f"*{notification.subject}*"] + [
+            f"• <{version.project.url}|{version.project.title}> {version.title}"
+            for version in notification.versions
+        ]
+        return {"text": "\n".join(lines)}
+
+
+class ConsoleChannel(NotificationChannel):
+    """
+    Writes notifications to the stream, standard output by default, in
+    place of e-mails.
+    """
+
+    per_recipient = True
+
+    def __init__(self, stream: Optional[TextIO] = None, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def send(self, notification: Notification) -> None:
+        stream = self.stream or sys.stdout
+        with self._lock:
+            stream.write(
+                f"{notification.subject} to {', '.join(notification.recipients)}\n"
+            )
+            stream.flush()
+
+
+class FileChannel(NotificationChannel):
+    """
+    Appends notifications to the file as JSON lines, in place of e-mails.
+    """
+
+    per_recipient = True
+
+    def __init__(self, path: str, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, notification: Notification) -> None:
+        data = dict(notification_data(notification), recipients=notification.recipients)
+        line = json.dumps(data) + "\n"
+        with self._lock, open(self.path, "a") as f:
+            f.write(line)
+
+
+class InMemoryChannel(NotificationChannel):
+    """
+    Keeps notifications in memory, waiting ``latency`` seconds per
+    notification to stand in for a remote service in tests and benchmarks.
+    """
+
+    per_recipient = True
+
+    def __init__(self, latency: float = 0.0, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.notifications: List[Notification] = []
+        self._lock = threading.Lock()
+
+    def send(self, notification: Notification) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.notifications.append(notification)
+
+
+def get_channel(name: str) -> NotificationChannel:
+    try:
+        config = settings.NOTIFICATION_CHANNELS[name]
+    except KeyError:
+        raise ImproperlyConfigured(f"Unknown notification channel {name!r}")
+    channel = import_string(config["BACKEND"])(
+        workers=config.get("WORKERS"),
+        batch_size=config.get("BATCH_SIZE"),
+        **config.get("OPTIONS", {}),
+    )
+    channel.per_recipient = is_per_recipient(name)
+    return channel
+
+
+def is_per_recipient(name: str) -> bool:
+    """
+    Tells whether the channel notifies every subscriber, which the channel
+    config can override with ``PER_RECIPIENT``.
+    """
+    config = settings.NOTIFICATION_CHANNELS[name]
+    if "PER_RECIPIENT" in config:
+        return config["PER_RECIPIENT"]
+    return import_string(config["BACKEND"]).per_recipient
+
+
+def get_channels(
+    names: Optional[Iterable[str]] = None,
+) -> Dict[str, NotificationChannel]:
+    """
+    Builds the channels configured in ``NOTIFICATION_CHANNELS``, all of
+    them by default.
+    """
+    if names is None:
+        names = settings.NOTIFICATION_CHANNELS
+    return {name: get_channel(name) for name in names}
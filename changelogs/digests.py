@@ -0,0 +1,172 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from changelogs.channels import Notification, NotificationChannel, get_channels
+from changelogs.models import NotificationJob, User, Version
+from changelogs.notifications import record_delivery, render_message_html
+
+DIGEST_CHUNK_SIZE = 500
+
+
+def _due_users(now: datetime):
+    due = Q()
+    for frequency, period in User.DIGEST_PERIODS.items():
+        due |= Q(notification_frequency=frequency) & (
+            Q(last_digest_at__isnull=True) | Q(last_digest_at__lte=now - period)
+        )
+    pending = NotificationJob.objects.filter(status=NotificationJob.PENDING)
+    return (
+        User.objects.filter(due, id__in=pending.values("user_id"))
+        .exclude(email="")
+        .order_by("id")
+        .values_list("id", "email")
+    )
+
+
+def _claim(user_ids: List[int], channel: str, now: datetime) -> List[NotificationJob]:
+    claimable = Q(status=NotificationJob.PENDING) | Q(
+        status=NotificationJob.SENDING,
+        locked_at__lt=now - settings.NOTIFICATION_LOCK_TIMEOUT,
+    )
+    with transaction.atomic():
+        ids = (
+            NotificationJob.objects.select_for_update(skip_locked=True)
+            .filter(claimable, channel=channel, user_id__in=user_ids)
+            .values_list("id", flat=True)
+        )
+        NotificationJob.objects.filter(id__in=list(ids)).update(
+            status=NotificationJob.SENDING, locked_at=now, attempts=F("attempts") + 1
+        )
+    # the claimed jobs are the ones locked at this run's time
+    return list(
+        NotificationJob.objects.filter(
+            user_id__in=user_ids,
+            channel=channel,
+            status=NotificationJob.SENDING,
+            locked_at=now,
+        )
+        .select_related("version__project")
+        .order_by("version__date_time", "version_id")
+    )
+
+
+def build_digest_notification(
+    versions: List[Version], html: str, recipients: List[str]
+) -> Notification:
+    return Notification(
+        subject=f"{len(versions)} new versions of your subscriptions",
+        html=html,
+        versions=versions,
+        recipients=recipients,
+    )
+
+
+def _send_channel_chunk(
+    emails: Dict[int, str],
+    now: datetime,
+    name: str,
+    channel: NotificationChannel,
+    versions_html: Dict[int, str],
+    counts: Dict[str, int],
+) -> List[int]:
+    jobs = _claim(list(emails), name, now)
+
+    # users with the same pending versions get the same digest
+    jobs_by_user: Dict[int, List[NotificationJob]] = {}
+    for job in jobs:
+        jobs_by_user.setdefault(job.user_id, []).append(job)
+    users_by_digest: Dict[Tuple[int, ...], List[int]] = {}
+    for user_id, user_jobs in jobs_by_user.items():
+        digest = tuple(job.version_id for job in user_jobs)
+        users_by_digest.setdefault(digest, []).append(user_id)
+
+    versions = {job.version_id: job.version for job in jobs}
+    for pk, version in versions.items():
+        if pk not in versions_html:
+            versions_html[pk] = render_message_html(version)
+    notifications = []
+    recipients = []
+    for digest, user_ids in users_by_digest.items():
+        html = "\n".join(versions_html[pk] for pk in digest)
+        for i in range(0, len(user_ids), channel.batch_size):
+            batch = user_ids[i : i + channel.batch_size]
+            notifications.append(
+                build_digest_notification(
+                    [versions[pk] for pk in digest],
+                    html,
+                    [emails[user_id] for user_id in batch],
+                )
+            )
+            recipients.append(batch)
+
+    sent_user_ids = []
+    errors = channel.send_many(notifications)
+    for batch, error in zip(recipients, errors):
+        if error is None:
+            sent_user_ids.extend(batch)
+        for user_id in batch:
+            for job in jobs_by_user[user_id]:
+                record_delivery(job, error)
+                counts[job.status] = counts.get(job.status, 0) + 1
+        counts["digests"] = counts.get("digests", 0) + (0 if error else len(batch))
+
+    NotificationJob.objects.bulk_update(
+        jobs, ["status", "sent_at", "next_attempt_at", "locked_at", "last_error"]
+    )
+    return sent_user_ids
+
+
+def _send_chunk(
+    users: List[Tuple[int, str]],
+    now: datetime,
+    channels: Dict[str, NotificationChannel],
+    versions_html: Dict[int, str],
+) -> Dict[str, int]:
+    emails = dict(users)
+    counts: Dict[str, int] = {}
+    sent_user_ids: List[int] = []
+    for name, channel in channels.items():
+        # events of the other channels are posted right away
+        if not channel.per_recipient:
+            continue
+        sent_user_ids += _send_channel_chunk(
+            emails, now, name, channel, versions_html, counts
+        )
+    User.objects.filter(id__in=sent_user_ids).update(last_digest_at=now)
+    return counts
+
+
+def send_digests(
+    chunk_size: Optional[int] = None,
+    channels: Optional[Dict[str, NotificationChannel]] = None,
+) -> Dict[str, int]:
+    """
+    Sends digests of pending versions to all users whose digest is due,
+    through every channel which notifies users.
+
+    Users are processed in chunks, each with the same few set-based queries
+    regardless of the number of users, projects and versions. Every version
+    is rendered once per run and every distinct digest once per chunk.
+    """
+    now = timezone.now()
+    if channels is None:
+        channels = get_channels()
+    due_users = _due_users(now)
+    counts: Dict[str, int] = {}
+    versions_html: Dict[int, str] = {}
+    last_id = 0
+    while True:
+        users = list(
+            due_users.filter(id__gt=last_id)[: chunk_size or DIGEST_CHUNK_SIZE]
+        )
+        if not users:
+            return counts
+        chunk_counts = _send_chunk(users, now, channels, versions_html)
+        for status, count in chunk_counts.items():
+            counts[status] = counts.get(status, 0) + count
+        last_id = users[-1][0]
@@ -0,0 +1,91 @@
+import json
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from changelogs.models import Project
+
+EXPORT_CHUNK_SIZE = 500
+# bytes of output collected before they are yielded
+EXPORT_BUFFER_SIZE = 64 * 1024
+EXPORT_FIELDS = ("title", "date_time", "body")
+
+CONTENT_TYPES = {
+    "md": "text/markdown; charset=utf-8",
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _versions(project: Project, since: Optional[datetime]) -> Iterator[Dict]:
+    versions = project.versions.order_by("date_time", "id")
+    if since is not None:
+        versions = versions.filter(date_time__gt=since)
+    # a server-side cursor where the database supports it
+    return versions.values(*EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def _dumps(version: Dict) -> str:
+    return json.dumps(version, cls=DjangoJSONEncoder)
+
+
+def _markdown(project: Project, versions: Iterator[Dict]) -> Iterator[str]:
+    yield f"# {project.title}\n"
+    for version in versions:
+        yield f"\n## {version['title']} ({version['date_time'].date()})\n\n"
+        yield f"{version['body'].strip()}\n"
+
+
+def _json(versions: Iterator[Dict]) -> Iterator[str]:
+    separator = "["
+    for version in versions:
+        yield separator + _dumps(version)
+        separator = ","
+    yield "]\n" if separator == "," else "[]\n"
+
+
+def _ndjson(versions: Iterator[Dict]) -> Iterator[str]:
+    for version in versions:
+        yield _dumps(version) + "\n"
+
+
+def _buffered(chunks: Iterator[str]) -> Iterator[str]:
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= EXPORT_BUFFER_SIZE:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def export_versions(
+    project: Project, export_format: str, since: Optional[datetime] = None
+) -> Iterator[str]:
+    """
+    Yields the versions of the project, from the oldest one, in the given
+    format without loading all of them at once. With ``since`` only the
+    versions released after it are exported.
+    """
+    versions = _versions(project, since)
+    if export_format == "md":
+        return _buffered(_markdown(project, versions))
+    if export_format == "json":
+        return _buffered(_json(versions))
+    if export_format == "ndjson":
+        return _buffered(_ndjson(versions))
+    raise ValueError(f"Unknown export format {export_format!r}")
+
+
+def gzip_chunks(chunks: Iterable[str]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode())
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,141 @@
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.db.models import Count, Max, QuerySet
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.views.decorators.http import condition
+
+from changelogs.models import Project, User, Version
+from changelogs.timeline import is_timeline_enabled, timeline_page
+
+
+def _latest_change(request, versions: QuerySet) -> Dict:
+    # computed once per request for both the ETag and the Last-Modified headers.
+    # Last-Modified is the latest updated_at like the one Feed sets itself.
+    if not hasattr(request, "_feed_latest_change"):
+        request._feed_latest_change = versions.aggregate(
+            date_time=Max("date_time"), updated_at=Max("updated_at"), count=Count("id")
+        )
+    return request._feed_latest_change
+
+
+def _project_versions(project_id: int) -> QuerySet:
+    return Version.objects.filter(project_id=project_id, project__is_public=True)
+
+
+def _user_versions(token: str) -> QuerySet:
+    return Version.objects.filter(project__subscribers__feed_token=token)
+
+
+def _etag(latest_change: Dict) -> Optional[str]:
+    # the count changes when versions disappear, e.g. after unsubscribing
+    if latest_change["date_time"] is None:
+        return None
+    return (
+        f"{latest_change['date_time'].timestamp()}"
+        f"-{latest_change['updated_at'].timestamp()}"
+        f"-{latest_change['count']}"
+    )
+
+
+def project_feed_etag(request, project_id: int) -> Optional[str]:
+    return _etag(_latest_change(request, _project_versions(project_id)))
+
+
+def project_feed_last_modified(request, project_id: int):
+    return _latest_change(request, _project_versions(project_id))["updated_at"]
+
+
+def user_feed_etag(request, token: str) -> Optional[str]:
+    return _etag(_latest_change(request, _user_versions(token)))
+
+
+def user_feed_last_modified(request, token: str):
+    return _latest_change(request, _user_versions(token))["updated_at"]
+
+
+class VersionsFeed(Feed):
+    """
+    Latest versions with their stored rendered bodies.
+    """
+
+    def item_title(self, version: Version) -> str:
+        return f"{version.project.title} {version.title}"
+
+    def item_description(self, version: Version) -> str:
+        return version.body_html
+
+    def item_link(self, version: Version) -> str:
+        return reverse(
+            "changelogs:version_detail", args=(version.project_id, version.id)
+        )
+
+    def item_pubdate(self, version: Version):
+        return version.date_time
+
+    def item_updateddate(self, version: Version):
+        return version.updated_at
+
+
+class ProjectRssFeed(VersionsFeed):
+    def get_object(self, request, project_id: int) -> Project:
+        return get_object_or_404(Project.objects.filter(is_public=True), pk=project_id)
+
+    def title(self, project: Project) -> str:
+        return f"{project.title} changelog"
+
+    def link(self, project: Project) -> str:
+        return reverse("changelogs:project_detail", args=(project.id,))
+
+    def description(self, project: Project) -> str:
+        return f"New versions of {project.title}"
+
+    def items(self, project: Project):
+        return project.versions.for_cards().order_by("-date_time", "-id")[
+            : settings.FEED_MAX_ITEMS
+        ]
+
+
+class ProjectAtomFeed(ProjectRssFeed):
+    feed_type = Atom1Feed
+    subtitle = ProjectRssFeed.description
+
+
+class UserRssFeed(VersionsFeed):
+    title = "Changelogs"
+    description = "New versions of your subscriptions"
+
+    def get_object(self, request, token: str):
+        return get_object_or_404(User, feed_token=token)
+
+    def link(self) -> str:
+        return reverse("changelogs:feed")
+
+    def items(self, user):
+        if is_timeline_enabled():
+            return timeline_page(user, None, settings.FEED_MAX_ITEMS).items
+        return (
+            Version.objects.filter(project__subscribers=user)
+            .for_cards()
+            .order_by("-date_time", "-id")[: settings.FEED_MAX_ITEMS]
+        )
+
+
+class UserAtomFeed(UserRssFeed):
+    feed_type = Atom1Feed
+    subtitle = UserRssFeed.description
+
+
+def conditional_project_feed(feed: Feed):
+    return condition(
+        etag_func=project_feed_etag, last_modified_func=project_feed_last_modified
+    )(feed)
+
+
+def conditional_user_feed(feed: Feed):
+    return condition(
+        etag_func=user_feed_etag, last_modified_func=user_feed_last_modified
+    )(feed)
@@ -0,0 +1,264 @@
+import threading
+import time
+from datetime import timedelta
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from changelogs.instrumentation import ProjectMetrics, measure
+from changelogs.models import FetchRun, Project, ProjectFetch
+from changelogs.rate_limits import RateLimitExceeded, RateLimitKey, rate_limits
+from changelogs.services import (
+    GITHUB_API_DOMAIN_NAME,
+    fetch_github_projects,
+    fetch_gitlab_projects,
+    get_github_batch_size,
+)
+
+MAX_DEFERRALS = 3
+
+
+class FetchResult:
+    def __init__(self) -> None:
+        self.fetched = 0
+        self.errors: List[Tuple[Project, BaseException]] = []
+        self.deferred: List[Project] = []
+        self.metrics: Dict[Project, ProjectMetrics] = {}
+        self.started_on = timezone.now()
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def total(self) -> int:
+        return self.fetched + len(self.errors)
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+
+class ProjectFetcher:
+    """
+    Fetches projects changelogs concurrently.
+
+    Every host gets its own pool and queue, and tasks take one of the
+    ``workers`` slots only once they start running, so a slow or throttled
+    host can't occupy all the workers with tasks waiting for its pool.
+    Projects which can be queried together (GitHub projects sharing a token,
+    GitLab projects with unresolved ids on the same host) are fetched in
+    batches by a single task.
+
+    Projects whose token has run out of rate limit are put aside while the
+    rest of the run goes on, and are fetched once the limit resets if that
+    happens within ``FETCH_RATE_LIMIT_MAX_WAIT`` seconds.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        host_concurrency: Optional[Dict[str, int]] = None,
+        default_host_concurrency: Optional[int] = None,
+        github_batch_size: Optional[int] = None,
+    ) -> None:
+        self.workers = workers or settings.FETCH_WORKERS
+        self.host_concurrency = {
+            **settings.FETCH_HOST_CONCURRENCY,
+            **(host_concurrency or {}),
+        }
+        self.default_host_concurrency = (
+            default_host_concurrency or settings.FETCH_DEFAULT_HOST_CONCURRENCY
+        )
+        self.github_batch_size = github_batch_size or get_github_batch_size()
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._batches: Dict[Tuple[str, str], List[Project]] = {}
+        self._deferred: List[Tuple[float, Project]] = []
+        self._deferrals: Dict[int, int] = {}
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+
+    def _executor(self, host: str) -> ThreadPoolExecutor:
+        if host not in self._executors:
+            self._executors[host] = ThreadPoolExecutor(
+                max_workers=min(
+                    self.workers,
+                    self.host_concurrency.get(host, self.default_host_concurrency),
+                ),
+                thread_name_prefix=f"fetch-{host}",
+            )
+        return self._executors[host]
+
+    def _fetch_projects(
+        self, projects: List[Project]
+    ) -> Tuple[Dict[Project, Optional[BaseException]], Dict[Project, ProjectMetrics]]:
+        try:
+            with self._slots, measure(projects) as metrics:
+                if projects[0].is_github_project is True:
+                    results = fetch_github_projects(projects, self.github_batch_size)
+                else:
+                    results = fetch_gitlab_projects(projects)
+        finally:
+            connection.close()
+        errors: Dict[Project, Optional[BaseException]] = {}
+        for project, created in results.items():
+            errors[project] = created if isinstance(created, Exception) else None
+            metrics[project].error = str(errors[project] or "")
+        return errors, metrics
+
+    @staticmethod
+    def _rate_limit_key(project: Project) -> RateLimitKey:
+        if project.is_github_project is True:
+            return GITHUB_API_DOMAIN_NAME, project.owner.github_token
+        return project.host, project.owner.gitlab_token
+
+    def _batch(self, project: Project) -> Tuple[Optional[Tuple[str, str]], int]:
+        if project.is_github_project is True:
+            return (project.host, project.owner.github_token), self.github_batch_size
+        if project.gitlab_project_id is None:
+            return (
+                (project.host, project.owner.gitlab_token),
+                settings.FETCH_GITLAB_BATCH_SIZE,
+            )
+        return None, 1
+
+    def _defer(
+        self, result: FetchResult, project: Project, reset_at: Optional[float]
+    ) -> None:
+        with self._lock:
+            self._deferrals[project.pk] = self._deferrals.get(project.pk, 0) + 1
+            if self._deferrals[project.pk] > MAX_DEFERRALS:
+                result.deferred.append(project)
+            else:
+                ready_at = reset_at or time.time() + settings.HTTP_MAX_BACKOFF
+                self._deferred.append((ready_at, project))
+
+    def _on_done(
+        self, result: FetchResult, projects: List[Project], future: Future
+    ) -> None:
+        exception = future.exception()
+        if exception is None:
+            errors, metrics = future.result()
+        else:
+            errors, metrics = {project: exception for project in projects}, {}
+        with self._lock:
+            for project, project_metrics in metrics.items():
+                result.metrics.setdefault(project, ProjectMetrics()).add(
+                    project_metrics
+                )
+        for project, error in errors.items():
+            if isinstance(error, RateLimitExceeded):
+                self._defer(result, project, error.reset_at)
+                continue
+            with self._lock:
+                if error is None:
+                    result.fetched += 1
+                else:
+                    result.errors.append((project, error))
+        with self._lock:
+            self._pending -= 1
+            self._idle.notify_all()
+
+    def _submit(self, result: FetchResult, projects: List[Project]) -> None:
+        with self._lock:
+            self._pending += 1
+        future = self._executor(projects[0].host).submit(self._fetch_projects, projects)
+        future.add_done_callback(partial(self._on_done, result, projects))
+
+    def _wait_for_tasks(self) -> None:
+        with self._idle:
+            self._idle.wait_for(lambda: self._pending == 0)
+
+    def _enqueue(self, result: FetchResult, project: Project) -> None:
+        reset_at = rate_limits.reset_at(self._rate_limit_key(project))
+        if reset_at is not None:
+            self._defer(result, project, reset_at)
+            return
+        key, batch_size = self._batch(project)
+        if key is None:
+            self._submit(result, [project])
+            return
+        self._batches.setdefault(key, []).append(project)
+        if len(self._batches[key]) >= batch_size:
+            self._submit(result, self._batches.pop(key))
+
+    def _flush(self, result: FetchResult) -> None:
+        while self._batches:
+            self._submit(result, self._batches.popitem()[1])
+
+    def _resume_deferred(self, result: FetchResult) -> None:
+        while True:
+            self._wait_for_tasks()
+            with self._lock:
+                deferred = sorted(self._deferred, key=lambda item: item[0])
+                self._deferred = []
+            if not deferred:
+                return
+            for ready_at, project in deferred:
+                delay = ready_at - time.time()
+                if delay > settings.FETCH_RATE_LIMIT_MAX_WAIT:
+                    result.deferred.append(project)
+                    continue
+                if delay > 0:
+                    time.sleep(delay)
+                self._enqueue(result, project)
+            self._flush(result)
+
+    def fetch(self, projects: Iterable[Project]) -> FetchResult:
+        result = FetchResult()
+        try:
+            for project in projects:
+                self._enqueue(result, project)
+            self._flush(result)
+            self._resume_deferred(result)
+        finally:
+            for executor in self._executors.values():
+                executor.shutdown(wait=True)
+            self._executors.clear()
+        result.finished_at = time.monotonic()
+        return result
+
+
+def save_fetch_run(result: FetchResult) -> FetchRun:
+    run = FetchRun.objects.create(
+        started_at=result.started_on,
+        finished_at=result.started_on + timedelta(seconds=result.elapsed),
+        fetched_count=result.fetched,
+        errors_count=len(result.errors),
+        deferred_count=len(result.deferred),
+    )
+    ProjectFetch.objects.bulk_create(
+        (
+            ProjectFetch(
+                run=run,
+                project=project,
+                requests=metrics.requests,
+                latency=metrics.latency,
+                bytes_received=metrics.bytes_received,
+                releases_seen=metrics.releases_seen,
+                releases_inserted=metrics.releases_inserted,
+                rate_limit_remaining=metrics.rate_limit_remaining,
+                error=metrics.error,
+            )
+            for project, metrics in result.metrics.items()
+        ),
+        batch_size=settings.FETCH_CHUNK_SIZE,
+    )
+    return run
+
+
+def projects_to_fetch(
+    chunk_size: Optional[int] = None, due_only: bool = True
+) -> Iterable[Project]:
+    projects = Project.objects.select_related("owner").order_by("id")
+    if due_only:
+        projects = projects.due_for_fetch()
+    return projects.iterator(chunk_size=chunk_size or settings.FETCH_CHUNK_SIZE)
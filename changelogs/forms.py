@@ -5,6 +5,7 @@ from django.forms import (
     Textarea,
     URLInput,
     EmailInput,
+    Select,
     SelectMultiple,
 )
 
@@ -20,6 +21,7 @@ class UserForm(ModelForm):
             "email",
             "gitlab_token",
             "github_token",
+            "notification_frequency",
         ]
         widgets = {
             "first_name": TextInput(attrs={"class": "form-control"}),
@@ -27,6 +29,7 @@ class UserForm(ModelForm):
             "email": EmailInput(attrs={"class": "form-control"}),
             "gitlab_token": TextInput(attrs={"class": "form-control"}),
             "github_token": TextInput(attrs={"class": "form-control"}),
+            "notification_frequency": Select(attrs={"class": "form-control"}),
         }
 
 
@@ -0,0 +1,60 @@
+from typing import Iterable, Tuple
+
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from django.utils.safestring import SafeString, mark_safe
+
+from changelogs.models import Version
+
+CACHE_ALIAS = "fragments"
+VERSION_CARD_TEMPLATE = "changelogs/_version.html"
+HITS_KEY = "version-card:hits"
+MISSES_KEY = "version-card:misses"
+
+
+def _version_card_key(version_id: int) -> str:
+    return f"version-card:{version_id}"
+
+
+def _count(key: str) -> None:
+    cache = caches[CACHE_ALIAS]
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def render_version_card(version: Version) -> SafeString:
+    """
+    Renders the version card, reusing the cached fragment as long as the
+    version wasn't updated since it was rendered.
+    """
+    cache = caches[CACHE_ALIAS]
+    key = _version_card_key(version.pk)
+    stamp = version.updated_at.isoformat()
+    cached = cache.get(key)
+    if cached is not None and cached[0] == stamp:
+        _count(HITS_KEY)
+        return mark_safe(cached[1])
+
+    _count(MISSES_KEY)
+    html = render_to_string(VERSION_CARD_TEMPLATE, {"version": version})
+    cache.set(key, (stamp, html))
+    return mark_safe(html)
+
+
+def invalidate_version_cards(version_ids: Iterable[int]) -> None:
+    caches[CACHE_ALIAS].delete_many([_version_card_key(pk) for pk in version_ids])
+
+
+def version_card_stats() -> Tuple[int, int]:
+    """
+    Returns the number of cache hits and misses of version cards.
+    """
+    counters = caches[CACHE_ALIAS].get_many([HITS_KEY, MISSES_KEY])
+    return counters.get(HITS_KEY, 0), counters.get(MISSES_KEY, 0)
+
+
+def reset_version_card_stats() -> None:
+    caches[CACHE_ALIAS].delete_many([HITS_KEY, MISSES_KEY])
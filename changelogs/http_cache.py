@@ -0,0 +1,75 @@
+import hashlib
+from datetime import datetime
+from typing import Callable, Optional, Sequence
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+
+from changelogs.models import Project
+
+
+def _viewer(user) -> Sequence:
+    # pages show the name of the signed in user and links depending on it
+    if user.is_anonymous:
+        return ("anonymous",)
+    return (
+        user.pk,
+        user.username,
+        user.first_name,
+        user.last_name,
+        user.email,
+        user.is_staff,
+    )
+
+
+def project_versions_state(project: Project) -> Sequence:
+    """
+    Returns cheap metadata which changes whenever versions of the project are
+    added, edited or deleted.
+    """
+    state = project.versions.order_by().aggregate(
+        updated_at=Max("updated_at"), count=Count("id")
+    )
+    return state["updated_at"], state["count"]
+
+
+def render_conditionally(
+    request,
+    project: Project,
+    last_modified: Optional[datetime],
+    validators: Sequence,
+    render: Callable[[], HttpResponse],
+) -> HttpResponse:
+    """
+    Answers with 304 when the client has the current version of the page,
+    otherwise renders it. Pages of public projects seen by anonymous users
+    can be cached by shared caches for ``PAGE_CACHE_MAX_AGE`` seconds, other
+    pages only by the browser, which has to revalidate them.
+
+    Callers look the project up among the projects the user can access.
+    """
+    validators = (_viewer(request.user), project.updated_at, *validators)
+    etag = quote_etag(hashlib.md5(repr(validators).encode()).hexdigest())
+    timestamp = int(
+        max(last_modified or project.updated_at, project.updated_at).timestamp()
+    )
+
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = render()
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(timestamp)
+
+    if project.is_public and request.user.is_anonymous:
+        patch_cache_control(response, public=True, max_age=settings.PAGE_CACHE_MAX_AGE)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ["Cookie"])
+    return response
@@ -0,0 +1,104 @@
+import logging
+import random
+import time
+from typing import Optional
+
+import requests
+from django.conf import settings
+from django.dispatch import Signal
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# 429 isn't retried: rate limited tokens are deferred by the fetch scheduler
+RETRY_STATUS_CODES = {500, 502, 503, 504}
+
+# Sent after every attempt of an upstream request with ``method``, ``url``,
+# ``request_headers``, ``response`` (or ``exception``) and ``elapsed`` seconds.
+upstream_request_finished = Signal()
+
+
+class HttpClient:
+    """
+    Keep-alive HTTP client shared by all outbound calls.
+
+    Connections are pooled per host, every request gets connect and read
+    timeouts, and failed requests (connection errors and 5xx responses) are
+    retried with jittered exponential backoff, up to ``HTTP_RETRIES`` times
+    or the given ``retries``. Rate limited responses are returned right away.
+    """
+
+    def __init__(self, pool_size: Optional[int] = None) -> None:
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=settings.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=pool_size or settings.HTTP_POOL_SIZE,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @staticmethod
+    def _backoff(attempt: int, response: Optional[requests.Response]) -> float:
+        delay = settings.HTTP_BACKOFF * 2 ** attempt
+        retry_after = (
+            response.headers.get("Retry-After") if response is not None else None
+        )
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, int(retry_after))
+        return min(delay, settings.HTTP_MAX_BACKOFF) * random.uniform(0.5, 1.0)
+
+    def request(
+        self, method: str, url: str, retries: Optional[int] = None, **kwargs
+    ) -> requests.Response:
+        kwargs.setdefault(
+            "timeout", (settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT)
+        )
+        if retries is None:
+            retries = settings.HTTP_RETRIES
+        attempt = 0
+        while True:
+            response: Optional[requests.Response] = None
+            exception: Optional[Exception] = None
+            started_at = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                exception = e
+            elapsed = time.monotonic() - started_at
+
+            logger.debug(
+                "%s %s -> %s in %.3fs",
+                method,
+                url,
+                response.status_code if response is not None else exception,
+                elapsed,
+            )
+            upstream_request_finished.send(
+                sender=self.__class__,
+                method=method,
+                url=url,
+                request_headers=kwargs.get("headers") or {},
+                response=response,
+                exception=exception,
+                elapsed=elapsed,
+            )
+
+            last_attempt = attempt >= retries
+            if response is not None and (
+                last_attempt or response.status_code not in RETRY_STATUS_CODES
+            ):
+                return response
+            if exception is not None and last_attempt:
+                raise exception
+
+            time.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+
+client = HttpClient()
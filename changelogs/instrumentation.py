@@ -0,0 +1,89 @@
+import math
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from django.dispatch import receiver
+
+from changelogs.http_client import upstream_request_finished
+from changelogs.models import Project
+
+_context = threading.local()
+
+
+class ProjectMetrics:
+    """
+    Metrics of fetching one project.
+
+    Requests made for a batch of projects are shared evenly among them.
+    """
+
+    def __init__(self) -> None:
+        self.requests = 0.0
+        self.latency = 0.0
+        self.bytes_received = 0.0
+        self.releases_seen = 0
+        self.releases_inserted = 0
+        self.rate_limit_remaining: Optional[int] = None
+        self.error = ""
+
+    def add(self, other: "ProjectMetrics") -> None:
+        self.requests += other.requests
+        self.latency += other.latency
+        self.bytes_received += other.bytes_received
+        self.releases_seen += other.releases_seen
+        self.releases_inserted += other.releases_inserted
+        if other.rate_limit_remaining is not None:
+            self.rate_limit_remaining = other.rate_limit_remaining
+        self.error = other.error
+
+
+@contextmanager
+def measure(projects: Sequence[Project]) -> Iterator[Dict[Project, ProjectMetrics]]:
+    """
+    Collects metrics of the upstream requests made by the current thread
+    while fetching the given projects.
+    """
+    metrics = {project: ProjectMetrics() for project in projects}
+    _context.metrics = metrics
+    try:
+        yield metrics
+    finally:
+        _context.metrics = None
+
+
+def record_releases(project: Project, seen: int, inserted: int) -> None:
+    metrics = getattr(_context, "metrics", None)
+    if metrics and project in metrics:
+        metrics[project].releases_seen += seen
+        metrics[project].releases_inserted += inserted
+
+
+@receiver(upstream_request_finished)
+def record_request(sender, response=None, elapsed=0.0, **kwargs):
+    metrics = getattr(_context, "metrics", None)
+    if not metrics:
+        return
+
+    content = getattr(response, "content", None)
+    received = len(content) if isinstance(content, bytes) else 0
+    remaining = None
+    if response is not None:
+        remaining = response.headers.get(
+            "X-RateLimit-Remaining", response.headers.get("RateLimit-Remaining")
+        )
+
+    share = 1 / len(metrics)
+    for project_metrics in metrics.values():
+        project_metrics.requests += share
+        project_metrics.latency += elapsed * share
+        project_metrics.bytes_received += received * share
+        if isinstance(remaining, str) and remaining.isdigit():
+            project_metrics.rate_limit_remaining = int(remaining)
+
+
+def percentile(values: List[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[max(0, math.ceil(len(values) * percent / 100) - 1)]
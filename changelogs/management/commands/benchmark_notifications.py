@@ -0,0 +1,112 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from changelogs.channels import ConsoleChannel, FileChannel, InMemoryChannel
+from changelogs.models import NotificationJob, Project, User, Version
+from changelogs.notifications import enqueue_notifications, send_notifications
+from changelogs.services import ingest_versions
+
+BACKENDS = ("memory", "file", "console")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures release notifications throughput of the local channels, "
+        "from storing versions to their delivery. Runs in a transaction "
+        "which is rolled back"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--versions", type=int, default=20)
+        parser.add_argument("--subscribers", type=int, default=500)
+        parser.add_argument(
+            "--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS)
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.05,
+            help="Seconds the memory channel spends per notification",
+        )
+        parser.add_argument("--workers", type=int)
+        parser.add_argument(
+            "--batch-size", type=int, help="Recipients per notification"
+        )
+
+    def _channel(self, backend: str, directory: str, devnull, options):
+        if backend == "memory":
+            return InMemoryChannel(latency=options["latency"], **options["channel"])
+        if backend == "file":
+            path = os.path.join(directory, "notifications.jsonl")
+            return FileChannel(path, **options["channel"])
+        return ConsoleChannel(stream=devnull, **options["channel"])
+
+    def _run(self, backend: str, channel, options):
+        owner = User.objects.create_user(username="benchmark-owner")
+        project = Project.objects.create(
+            title="benchmark", url="https://github.com/django/django", owner=owner
+        )
+        usernames = [f"benchmark-{i}" for i in range(options["subscribers"])]
+        User.objects.bulk_create(
+            User(username=username, email=f"{username}@example.com")
+            for username in usernames
+        )
+        project.subscribers.add(
+            *User.objects.filter(username__in=usernames).values_list("id", flat=True)
+        )
+        body = "## Features\n\n" + "* change\n" * 50
+
+        started_at = time.monotonic()
+        for i in range(options["versions"]):
+            created = ingest_versions(
+                project,
+                [
+                    Version(
+                        title=f"{i}.0",
+                        date_time=timezone.now(),
+                        project=project,
+                        body=body,
+                    )
+                ],
+            )
+            # the post_save receiver enqueues them for the configured channels
+            enqueue_notifications(created, {backend: channel.per_recipient})
+        while send_notifications(channels={backend: channel}):
+            pass
+        elapsed = time.monotonic() - started_at
+
+        jobs = NotificationJob.objects.filter(
+            channel=backend, status=NotificationJob.SENT, version__project=project
+        )
+        latencies = [
+            (sent_at - created_at).total_seconds()
+            for sent_at, created_at in jobs.values_list(
+                "sent_at", "version__created_at"
+            )
+        ]
+        return len(latencies), elapsed, sum(latencies) / (len(latencies) or 1)
+
+    def handle(self, *args, **options):
+        options["channel"] = {
+            "workers": options["workers"],
+            "batch_size": options["batch_size"],
+        }
+        with tempfile.TemporaryDirectory() as directory, open(
+            os.devnull, "w"
+        ) as devnull:
+            for backend in options["backends"]:
+                channel = self._channel(backend, directory, devnull, options)
+                with transaction.atomic():
+                    delivered, elapsed, latency = self._run(backend, channel, options)
+                    transaction.set_rollback(True)
+                self.stdout.write(
+                    f"{backend}: {delivered} notifications in {elapsed:.2f}s "
+                    f"({delivered / elapsed:.1f} notifications/s), "
+                    f"{latency:.3f}s from insert to delivery "
+                    "on average"
+                )
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from changelogs.notifications import enqueue_missing_notifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Enqueues release notifications of recently stored versions which were "
+        "stored without enqueueing them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours",
+            type=float,
+            default=24,
+            help="Look at the versions stored in the last hours",
+        )
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(hours=options["hours"])
+        count = enqueue_missing_notifications(since)
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully enqueued {count} release notifications")
+        )
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from changelogs.export import CONTENT_TYPES, export_versions, gzip_chunks
+from changelogs.models import Project
+
+
+class Command(BaseCommand):
+    help = "Exports the changelog of a project"
+
+    def add_arguments(self, parser):
+        parser.add_argument("project_id", type=int)
+        parser.add_argument(
+            "--format", choices=sorted(CONTENT_TYPES), default="md", dest="format"
+        )
+        parser.add_argument(
+            "--since", help="Export only versions released after this date and time"
+        )
+        parser.add_argument(
+            "--output", help="File to write to, the standard output by default"
+        )
+        parser.add_argument(
+            "--gzip", action="store_true", help="Compress the output file with gzip"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            project = Project.objects.get(pk=options["project_id"])
+        except Project.DoesNotExist:
+            raise CommandError(f"Project {options['project_id']} does not exist")
+
+        since = None
+        if options["since"]:
+            try:
+                since = parse_datetime(options["since"])
+            except ValueError:
+                since = None
+            if since is None:
+                raise CommandError(f"Invalid date and time {options['since']!r}")
+
+        chunks = export_versions(project, options["format"], since)
+        if options["gzip"]:
+            if not options["output"]:
+                raise CommandError("--gzip requires --output")
+            with open(options["output"], "wb") as output:
+                for compressed in gzip_chunks(chunks):
+                    output.write(compressed)
+        elif options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
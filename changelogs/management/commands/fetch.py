@@ -1,17 +1,158 @@
-from django.core.management.base import BaseCommand
+from typing import Dict, List
 
-from changelogs.models import Project
-from changelogs.services import fetch_github_project, fetch_gitlab_project
+from django.core.management.base import BaseCommand, CommandError
+
+from changelogs.fetcher import (
+    FetchResult,
+    ProjectFetcher,
+    projects_to_fetch,
+    save_fetch_run,
+)
+from changelogs.instrumentation import ProjectMetrics, percentile
+from changelogs.models import FetchRun, ProjectFetch
+
+PERCENTILES = (50, 90, 99)
+
+
+def _parse_host_concurrency(value: str):
+    host, _, limit = value.rpartition("=")
+    if not host or not limit.isdigit() or int(limit) < 1:
+        raise CommandError(f"Host concurrency must look like HOST=N, got {value!r}")
+    return host, int(limit)
 
 
 class Command(BaseCommand):
     help = "Fetches all projects changelogs"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, help="Maximum number of projects fetched at once"
+        )
+        parser.add_argument(
+            "--host-concurrency",
+            action="append",
+            default=[],
+            metavar="HOST=N",
+            help="Maximum number of concurrent requests to HOST",
+        )
+        parser.add_argument(
+            "--github-batch-size",
+            type=int,
+            help="Number of GitHub repositories queried per request",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Fetch all projects, not only the ones due for fetching",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, help="Number of projects loaded per query"
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Print percentiles of upstream latency, requests and bytes per host",
+        )
+        parser.add_argument(
+            "--profile",
+            type=int,
+            nargs="?",
+            const=10,
+            metavar="N",
+            help="Print the N slowest projects",
+        )
+
+    def _write_percentiles(self, name: str, values: List[float]) -> None:
+        self.stdout.write(
+            f"  {name}: "
+            + " ".join(f"p{p}={percentile(values, p):.3f}" for p in PERCENTILES)
+            + f" max={max(values, default=0):.3f}"
+        )
+
+    def _write_stats(self, result: FetchResult, run: FetchRun) -> None:
+        by_host: Dict[str, List[ProjectMetrics]] = {}
+        for project, metrics in result.metrics.items():
+            by_host.setdefault(project.host, []).append(metrics)
+
+        for host, host_metrics in sorted(by_host.items()):
+            self.stdout.write(
+                f"{host}: {len(host_metrics)} projects, "
+                f"{sum(m.requests for m in host_metrics):.0f} requests, "
+                f"{sum(m.bytes_received for m in host_metrics) / 1024:.1f} KiB"
+            )
+            self._write_percentiles("latency, s", [m.latency for m in host_metrics])
+            self._write_percentiles("requests", [m.requests for m in host_metrics])
+            self._write_percentiles(
+                "received, KiB", [m.bytes_received / 1024 for m in host_metrics]
+            )
+
+        previous_run = FetchRun.objects.filter(started_at__lt=run.started_at).first()
+        if previous_run is not None:
+            self.stdout.write(f"previous run at {previous_run.started_at}:")
+            self._write_percentiles(
+                "latency, s",
+                list(
+                    ProjectFetch.objects.filter(run=previous_run).values_list(
+                        "latency", flat=True
+                    )
+                ),
+            )
+
+    def _write_profile(self, result: FetchResult, limit: int) -> None:
+        slowest = sorted(
+            result.metrics.items(), key=lambda item: item[1].latency, reverse=True
+        )
+        for project, metrics in slowest[:limit]:
+            self.stdout.write(
+                f"{metrics.latency:8.3f}s {metrics.requests:5.1f} requests "
+                f"{metrics.bytes_received / 1024:8.1f} KiB "
+                f"{metrics.releases_inserted}/{metrics.releases_seen} releases "
+                f"{project}" + (f" error: {metrics.error}" if metrics.error else "")
+            )
+
     def handle(self, *args, **options):
-        for project in Project.objects.all():
-            if project.is_github_project is True:
-                fetch_github_project(project)
-            else:
-                fetch_gitlab_project(project)
+        fetcher = ProjectFetcher(
+            workers=options["workers"],
+            host_concurrency=dict(
+                _parse_host_concurrency(value) for value in options["host_concurrency"]
+            ),
+            github_batch_size=options["github_batch_size"],
+        )
+        result = fetcher.fetch(
+            projects_to_fetch(
+                chunk_size=options["chunk_size"], due_only=not options["all"]
+            )
+        )
+
+        run = save_fetch_run(result)
+
+        for project, error in result.errors:
+            self.stderr.write(f"Failed to fetch {project}: {error}")
+
+        if options["stats"]:
+            self._write_stats(result, run)
+        if options["profile"]:
+            self._write_profile(result, options["profile"])
+
+        if result.deferred:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{len(result.deferred)} projects are deferred "
+                    "until their rate limits reset"
+                )
+            )
 
-        self.stdout.write(self.style.SUCCESS("Successfully fetched changelogs"))
+        summary = (
+            f"{result.total} projects in {result.elapsed:.2f}s "
+            f"({result.throughput:.1f} projects/s)"
+        )
+        if result.errors:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Fetched changelogs with {len(result.errors)} errors: {summary}"
+                )
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"Successfully fetched changelogs: {summary}")
+            )
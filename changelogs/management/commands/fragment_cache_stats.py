@@ -0,0 +1,36 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from changelogs.fragment_cache import (
+    CACHE_ALIAS,
+    reset_version_card_stats,
+    version_card_stats,
+)
+
+
+class Command(BaseCommand):
+    help = "Prints the hit ratio of the version cards cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset", action="store_true", help="Reset the counters afterwards"
+        )
+
+    def handle(self, *args, **options):
+        if isinstance(caches[CACHE_ALIAS], LocMemCache):
+            self.stderr.write(
+                self.style.WARNING(
+                    "The fragments cache is local to every process, so this "
+                    "command can't see the counters of the web processes. "
+                    "Set FRAGMENT_CACHE_BACKEND to a shared cache."
+                )
+            )
+        hits, misses = version_card_stats()
+        lookups = hits + misses
+        ratio = hits / lookups if lookups else 0
+        self.stdout.write(
+            f"Version cards: {hits} hits, {misses} misses, hit ratio {ratio:.1%}"
+        )
+        if options["reset"]:
+            reset_version_card_stats()
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from changelogs.models import User
+from changelogs.timeline import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuilds feed timelines of users from their subscriptions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "usernames", nargs="*", help="Users to rebuild, all of them by default"
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by("id")
+        if options["usernames"]:
+            users = users.filter(username__in=options["usernames"])
+        count = rebuild(users.iterator())
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully rebuilt timelines: {count} entries")
+        )
@@ -0,0 +1,88 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Tuple
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from changelogs.models import MARKDOWN_RENDERER_VERSION, Version, render_markdown
+
+
+def _render(row: Tuple[int, str, str]) -> Tuple[int, str]:
+    pk, body, project_url = row
+    return pk, render_markdown(body, project_url)
+
+
+def _chunks(rows, size: int) -> Iterator[List[Tuple[int, str, str]]]:
+    # keyset pagination, so rows updated in between don't shift the pages
+    last_id = 0
+    while True:
+        chunk = list(rows.filter(id__gt=last_id)[:size])
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1][0]
+
+
+class Command(BaseCommand):
+    help = "Renders versions bodies which are missing or rendered by an older renderer"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-render all versions, not only the stale ones",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of rendering processes",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of versions loaded and updated at once",
+        )
+
+    def handle(self, *args, **options):
+        versions = Version.objects.order_by("id")
+        if not options["all"]:
+            versions = versions.exclude(renderer_version=MARKDOWN_RENDERER_VERSION)
+        rows = versions.values_list("id", "body", "project__url")
+
+        executor = None
+        if options["workers"] > 1:
+            executor = ProcessPoolExecutor(max_workers=options["workers"])
+        rendered_count = 0
+        try:
+            for chunk in _chunks(rows, options["chunk_size"]):
+                if executor is not None:
+                    rendered = executor.map(
+                        _render, chunk, chunksize=max(1, len(chunk) // 4)
+                    )
+                else:
+                    rendered = map(_render, chunk)
+                updated = [
+                    Version(
+                        pk=pk,
+                        rendered_body=html,
+                        renderer_version=MARKDOWN_RENDERER_VERSION,
+                        updated_at=timezone.now(),
+                    )
+                    for pk, html in rendered
+                ]
+                with transaction.atomic():
+                    Version.objects.bulk_update(
+                        updated, ["rendered_body", "renderer_version", "updated_at"]
+                    )
+                rendered_count += len(updated)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully rendered {rendered_count} versions")
+        )
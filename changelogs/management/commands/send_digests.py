@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from changelogs.channels import get_channels
+from changelogs.digests import send_digests
+
+
+class Command(BaseCommand):
+    help = "Sends digests of new versions to users whose digest is due"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, help="Number of users processed at once"
+        )
+        parser.add_argument(
+            "--channel",
+            action="append",
+            dest="channels",
+            help="Channel to send, all of them by default",
+        )
+
+    def handle(self, *args, **options):
+        counts = send_digests(options["chunk_size"], get_channels(options["channels"]))
+        digests = counts.pop("digests", 0)
+        summary = ", ".join(
+            f"{count} {status}" for status, count in sorted(counts.items())
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully sent {digests} digests: {summary or 'no versions'}"
+            )
+        )
@@ -0,0 +1,57 @@
+import time
+from typing import Dict
+
+from django.core.management.base import BaseCommand
+
+from changelogs.channels import get_channels
+from changelogs.notifications import send_notifications
+
+
+class Command(BaseCommand):
+    help = "Sends release notifications waiting in the outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Number of notifications of a channel claimed at once",
+        )
+        parser.add_argument(
+            "--channel",
+            action="append",
+            dest="channels",
+            help="Channel to send, all of them by default. Run a worker per "
+            "channel so slow channels don't hold up the others",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling the outbox instead of exiting once it is empty",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=10,
+            help="Seconds to wait for new notifications when the outbox is empty",
+        )
+
+    def handle(self, *args, **options):
+        totals: Dict[str, int] = {}
+        channels = get_channels(options["channels"])
+        while True:
+            counts = send_notifications(options["batch_size"], channels)
+            for status, count in counts.items():
+                totals[status] = totals.get(status, 0) + count
+            if not counts:
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+
+        summary = ", ".join(
+            f"{count} {status}" for status, count in sorted(totals.items())
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully processed the outbox: {summary or 'empty'}"
+            )
+        )
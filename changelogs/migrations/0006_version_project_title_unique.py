@@ -0,0 +1,58 @@
+# Generated by Django 3.0.3 on 2026-10-18 20:48
+
+import logging
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+logger = logging.getLogger(__name__)
+
+
+def delete_duplicated_versions(apps, schema_editor):
+    """
+    Keeps the first of the versions with the same title in a project and
+    deletes the others, which the unique constraint wouldn't allow.
+    """
+    Version = apps.get_model("changelogs", "Version")
+    # without the model's ordering, which would be grouped by as well
+    duplicates = (
+        Version.objects.order_by()
+        .values("project", "title")
+        .annotate(first_id=Min("id"), count=Count("id"))
+        .filter(count__gt=1)
+    )
+    versions = rows = 0
+    for duplicate in duplicates:
+        count, counts = (
+            Version.objects.filter(
+                project=duplicate["project"], title=duplicate["title"]
+            )
+            .exclude(id=duplicate["first_id"])
+            .delete()
+        )
+        rows += count
+        versions += counts.get("changelogs.Version", 0)
+    if versions:
+        # the duplicates are users' data, so operators should know about it
+        logger.warning(
+            "Deleted %d duplicated versions, %d rows with the related ones",
+            versions,
+            rows,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("changelogs", "0005_auto_20200421_0748"),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicated_versions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="version",
+            constraint=models.UniqueConstraint(
+                fields=("project", "title"), name="versions_project_title_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.0.3 on 2026-10-18 20:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("changelogs", "0006_version_project_title_unique"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="last_released_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="releases_cursor",
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+    ]
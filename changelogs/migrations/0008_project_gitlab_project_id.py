@@ -0,0 +1,18 @@
+# Generated by Django 3.0.3 on 2026-10-18 20:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("changelogs", "0007_project_fetch_state"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="gitlab_project_id",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
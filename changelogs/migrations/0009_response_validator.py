@@ -0,0 +1,46 @@
+# Generated by Django 3.0.3 on 2026-10-18 20:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("changelogs", "0008_project_gitlab_project_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResponseValidator",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("url", models.URLField()),
+                ("etag", models.CharField(blank=True, max_length=200)),
+                ("last_modified", models.CharField(blank=True, max_length=50)),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="response_validators",
+                        to="changelogs.Project",
+                    ),
+                ),
+            ],
+            options={"db_table": "response_validators",},
+        ),
+        migrations.AddConstraint(
+            model_name="responsevalidator",
+            constraint=models.UniqueConstraint(
+                fields=("project", "url"), name="response_validators_project_url_unique"
+            ),
+        ),
+    ]
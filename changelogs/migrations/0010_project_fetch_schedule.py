@@ -0,0 +1,30 @@
+# Generated by Django 3.0.3 on 2026-10-18 20:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("changelogs", "0009_response_validator"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="fetch_interval",
+            field=models.DurationField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="next_fetch_at",
+            field=models.DateTimeField(
+                blank=True, db_index=True, editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="unchanged_fetch_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
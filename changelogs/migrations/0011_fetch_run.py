@@ -0,0 +1,71 @@
+# Generated by Django 3.0.3 on 2026-10-18 21:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("changelogs", "0010_project_fetch_schedule"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FetchRun",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("started_at", models.DateTimeField()),
+                ("finished_at", models.DateTimeField()),
+                ("fetched_count", models.PositiveIntegerField(default=0)),
+                ("errors_count", models.PositiveIntegerField(default=0)),
+                ("deferred_count", models.PositiveIntegerField(default=0)),
+            ],
+            options={"db_table": "fetch_runs", "ordering": ["-started_at"],},
+        ),
+        migrations.CreateModel(
+            name="ProjectFetch",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("requests", models.FloatField(default=0)),
+                ("latency", models.FloatField(default=0)),
+                ("bytes_received", models.FloatField(default=0)),
+                ("releases_seen", models.PositiveIntegerField(default=0)),
+                ("releases_inserted", models.PositiveIntegerField(default=0)),
+                ("rate_limit_remaining", models.IntegerField(blank=True, null=True)),
+                ("error", models.TextField(blank=True)),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="changelogs.Project",
+                    ),
+                ),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="project_fetches",
+                        to="changelogs.FetchRun",
+                    ),
+                ),
+            ],
+            options={"db_table": "project_fetches", "ordering": ["-latency"],},
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.0.3 on 2026-10-18 21:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("changelogs", "0011_fetch_run"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="version",
+            name="rendered_body",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name="version",
+            name="renderer_version",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.0.3 on 2026-10-18 21:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("changelogs", "0012_version_rendered_body"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="version",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.0.3 on 2026-10-18 21:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("changelogs", "0013_version_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="version",
+            index=models.Index(
+                fields=["-date_time", "-id"], name="versions_date_time_id_idx"
+            ),
+        ),
+    ]
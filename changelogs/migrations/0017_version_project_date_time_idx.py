@@ -0,0 +1,20 @@
+# Generated by Django 3.0.3 on 2026-10-18 21:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("changelogs", "0016_project_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="version",
+            index=models.Index(
+                fields=["project", "-date_time", "-id"],
+                name="versions_project_date_time_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 3.0.3 on 2026-10-18 21:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("changelogs", "0017_version_project_date_time_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationJob",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("sending", "Sending"),
+                            ("sent", "Sent"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("locked_at", models.DateTimeField(blank=True, null=True)),
+                ("sent_at", models.DateTimeField(blank=True, null=True)),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "version",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="changelogs.Version",
+                    ),
+                ),
+            ],
+            options={"db_table": "notification_jobs", "ordering": ["-created_at"],},
+        ),
+        migrations.AddIndex(
+            model_name="notificationjob",
+            index=models.Index(
+                fields=["status", "next_attempt_at"], name="notification_jobs_due_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="notificationjob",
+            constraint=models.UniqueConstraint(
+                fields=("version", "user"), name="notification_jobs_version_user_unique"
+            ),
+        ),
+    ]
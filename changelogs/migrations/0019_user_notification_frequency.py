@@ -0,0 +1,32 @@
+# Generated by Django 3.0.3 on 2026-10-18 21:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("changelogs", "0018_notification_job"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="last_digest_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="notification_frequency",
+            field=models.CharField(
+                choices=[
+                    ("immediate", "Immediately"),
+                    ("hourly", "Hourly digest"),
+                    ("daily", "Daily digest"),
+                    ("weekly", "Weekly digest"),
+                ],
+                default="immediate",
+                max_length=10,
+            ),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 3.0.3 on 2026-10-18 21:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("changelogs", "0019_user_notification_frequency"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="version",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="NotificationDelivery",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version_title", models.CharField(max_length=20)),
+                ("channel", models.CharField(default="email", max_length=20)),
+                ("claim_token", models.UUIDField(editable=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="changelogs.Project",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={"db_table": "notification_deliveries",},
+        ),
+        migrations.AddConstraint(
+            model_name="notificationdelivery",
+            constraint=models.UniqueConstraint(
+                fields=("project", "version_title", "user", "channel"),
+                name="notification_deliveries_unique",
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.0.3 on 2026-10-18 21:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("changelogs", "0020_notification_delivery"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="notificationjob", name="notification_jobs_version_user_unique",
+        ),
+        migrations.RemoveIndex(
+            model_name="notificationjob", name="notification_jobs_due_idx",
+        ),
+        migrations.AddField(
+            model_name="notificationjob",
+            name="channel",
+            field=models.CharField(default="email", max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name="notificationjob",
+            index=models.Index(
+                fields=["channel", "status", "next_attempt_at"],
+                name="notification_jobs_due_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="notificationjob",
+            constraint=models.UniqueConstraint(
+                fields=("version", "user", "channel"),
+                name="notification_jobs_version_user_channel_unique",
+            ),
+        ),
+    ]
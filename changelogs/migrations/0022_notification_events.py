@@ -0,0 +1,51 @@
+# Generated by Django 3.0.3 on 2026-10-18 21:37
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("changelogs", "0021_notification_job_channel"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="notificationdelivery",
+            name="user",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="notificationjob",
+            name="user",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="notificationdelivery",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(user__isnull=True),
+                fields=("project", "version_title", "channel"),
+                name="notification_deliveries_event_unique",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="notificationjob",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(user__isnull=True),
+                fields=("version", "channel"),
+                name="notification_jobs_version_channel_event_unique",
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+import changelogs.models
+
+
+def generate_feed_tokens(apps, schema_editor):
+    User = apps.get_model("changelogs", "User")
+    for user in User.objects.only("id").iterator():
+        User.objects.filter(pk=user.pk).update(
+            feed_token=changelogs.models.generate_feed_token()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("changelogs", "0022_notification_events"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="feed_token",
+            field=models.CharField(editable=False, max_length=40, null=True),
+        ),
+        migrations.RunPython(generate_feed_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="user",
+            name="feed_token",
+            field=models.CharField(
+                default=changelogs.models.generate_feed_token,
+                editable=False,
+                max_length=40,
+                unique=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.0.3 on 2026-10-18 21:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("changelogs", "0023_user_feed_token"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="notificationjob",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("sending", "Sending"),
+                    ("sent", "Sent"),
+                    ("failed", "Failed"),
+                    ("skipped", "Skipped"),
+                ],
+                default="pending",
+                max_length=10,
+            ),
+        ),
+    ]
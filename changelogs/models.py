@@ -1,24 +1,74 @@
+import secrets
+from datetime import timedelta
+from typing import Dict, Mapping
 from urllib.parse import urlparse
 
 import markdown as md
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Q
+from django.utils import timezone
 
 from changelogs.validators import validate_project_url
 
 GITHUB_DOMAIN_NAME = "github.com"
 
+# Bump it whenever the markdown extensions or the rendering below change, so
+# stale ``Version.rendered_body`` values get re-rendered by ``render_versions``
+MARKDOWN_RENDERER_VERSION = 1
+
+
+def render_markdown(body: str, project_url: str) -> str:
+    body = body.replace("![image](/", f"![image]({project_url}/")
+    return md.markdown(body, extensions=["markdown.extensions.fenced_code"])
+
+
+def generate_feed_token() -> str:
+    return secrets.token_urlsafe(30)
+
 
 class User(AbstractUser):
+    IMMEDIATE = "immediate"
+    HOURLY = "hourly"
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    NOTIFICATION_FREQUENCIES = [
+        (IMMEDIATE, "Immediately"),
+        (HOURLY, "Hourly digest"),
+        (DAILY, "Daily digest"),
+        (WEEKLY, "Weekly digest"),
+    ]
+    DIGEST_PERIODS = {
+        HOURLY: timedelta(hours=1),
+        DAILY: timedelta(days=1),
+        WEEKLY: timedelta(weeks=1),
+    }
+
     gitlab_token = models.CharField(max_length=20, blank=True)
     github_token = models.CharField(max_length=40, blank=True)
+    notification_frequency = models.CharField(
+        max_length=10, choices=NOTIFICATION_FREQUENCIES, default=IMMEDIATE
+    )
+    last_digest_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # read-only access to the user's feeds, unlike the API token
+    feed_token = models.CharField(
+        max_length=40, unique=True, default=generate_feed_token, editable=False
+    )
+
+    def regenerate_feed_token(self) -> None:
+        self.feed_token = generate_feed_token()
+        self.save(update_fields=["feed_token"])
 
 
 class ProjectQuerySet(models.QuerySet):
     def accessible_by_user(self, user):
         return self.filter(Q(team=user) | Q(owner=user) | Q(is_public=True)).distinct()
 
+    def due_for_fetch(self):
+        return self.filter(
+            Q(next_fetch_at__isnull=True) | Q(next_fetch_at__lte=timezone.now())
+        )
+
 
 class Project(models.Model):
     class Meta:
@@ -33,6 +83,17 @@ class Project(models.Model):
         User, default=None, null=False, on_delete=models.PROTECT, related_name="owner"
     )
     team = models.ManyToManyField(User, blank=True, related_name="team")
+    releases_cursor = models.CharField(max_length=100, blank=True, editable=False)
+    last_released_at = models.DateTimeField(null=True, blank=True, editable=False)
+    gitlab_project_id = models.PositiveIntegerField(
+        null=True, blank=True, editable=False
+    )
+    next_fetch_at = models.DateTimeField(
+        null=True, blank=True, editable=False, db_index=True
+    )
+    fetch_interval = models.DurationField(null=True, blank=True, editable=False)
+    unchanged_fetch_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def is_subscribed_by_user(self, user: User) -> bool:
         return user in self.subscribers.all()
@@ -47,11 +108,16 @@ class Project(models.Model):
 
     @property
     def versions(self):
-        return Version.objects.filter(project=self)
+        # the versions of the related manager reuse this instance as their project
+        return self.version_set.all()
+
+    @property
+    def host(self) -> str:
+        return urlparse(self.url).netloc
 
     @property
     def is_github_project(self) -> bool:
-        return urlparse(self.url).netloc == GITHUB_DOMAIN_NAME
+        return self.host == GITHUB_DOMAIN_NAME
 
     def __str__(self):
         return f"{self.title} ({self.url})"
@@ -59,20 +125,284 @@ class Project(models.Model):
     objects = ProjectQuerySet.as_manager()
 
 
+class VersionQuerySet(models.QuerySet):
+    def for_cards(self):
+        """
+        Loads versions with their projects and only the columns needed to
+        render version cards. ``body`` is loaded separately only for the
+        versions rendered by an older renderer.
+        """
+        return self.select_related("project").only(
+            "title",
+            "date_time",
+            "rendered_body",
+            "renderer_version",
+            "updated_at",
+            "project__id",
+            "project__title",
+            "project__url",
+        )
+
+
 class Version(models.Model):
     class Meta:
         db_table = "versions"
         ordering = ["-date_time"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["project", "title"], name="versions_project_title_unique"
+            )
+        ]
+        indexes = [
+            # keyset pagination of feeds
+            models.Index(
+                fields=["-date_time", "-id"], name="versions_date_time_id_idx"
+            ),
+            # keyset pagination of project versions
+            models.Index(
+                fields=["project", "-date_time", "-id"],
+                name="versions_project_date_time_idx",
+            ),
+        ]
 
     title = models.CharField(max_length=20)
     date_time = models.DateTimeField()
     body = models.TextField()
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    rendered_body = models.TextField(blank=True, editable=False)
+    renderer_version = models.PositiveSmallIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    # unknown for the versions stored before it was added
+    created_at = models.DateTimeField(auto_now_add=True, null=True)
+
+    objects = VersionQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.title} ({self.project.title})"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "body" in update_fields:
+            self.render()
+            if update_fields is not None:
+                kwargs["update_fields"] = {
+                    *update_fields,
+                    "rendered_body",
+                    "renderer_version",
+                }
+        # post_save receivers (e.g. the notification outbox) write in the
+        # same transaction as the version
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def render(self):
+        # render the body the way it will be stored
+        body = self._meta.get_field("body").to_python(self.body)
+        self.rendered_body = render_markdown(body, self.project.url)
+        self.renderer_version = MARKDOWN_RENDERER_VERSION
+
     @property
     def body_html(self):
-        body = self.body.replace("![image](/", f"![image]({self.project.url}/")
-        return md.markdown(body, extensions=["markdown.extensions.fenced_code"])
+        if self.renderer_version == MARKDOWN_RENDERER_VERSION:
+            return self.rendered_body
+        return render_markdown(self.body, self.project.url)
+
+
+class ResponseValidator(models.Model):
+    class Meta:
+        db_table = "response_validators"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["project", "url"], name="response_validators_project_url_unique"
+            )
+        ]
+
+    project = models.ForeignKey(
+        Project, on_delete=models.CASCADE, related_name="response_validators"
+    )
+    url = models.URLField()
+    etag = models.CharField(max_length=200, blank=True)
+    last_modified = models.CharField(max_length=50, blank=True)
+
+    @property
+    def request_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        self.etag = headers.get("ETag", "")
+        self.last_modified = headers.get("Last-Modified", "")
+
+    def __str__(self):
+        return f"{self.url} ({self.project.title})"
+
+
+class TimelineEntry(models.Model):
+    """
+    A version in the feed of a user, stored when ``FEED_MODE`` is "timeline".
+    """
+
+    class Meta:
+        db_table = "timeline_entries"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "version"], name="timeline_entries_user_version_unique"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-date_time", "-version"],
+                name="timeline_user_date_time_idx",
+            )
+        ]
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="timeline_entries"
+    )
+    version = models.ForeignKey(Version, on_delete=models.CASCADE)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    # copy of version.date_time, so pages are read from the index only
+    date_time = models.DateTimeField()
+
+
+class NotificationDelivery(models.Model):
+    """
+    The ledger of notifications about versions, one per user and channel,
+    or one per channel for channels which post events, like webhooks.
+
+    A version is identified by its project and title rather than by its id,
+    so a version which is deleted and fetched again isn't notified twice.
+    """
+
+    EMAIL = "email"
+
+    class Meta:
+        db_table = "notification_deliveries"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["project", "version_title", "user", "channel"],
+                name="notification_deliveries_unique",
+            ),
+            # NULLs aren't equal in unique constraints
+            models.UniqueConstraint(
+                fields=["project", "version_title", "channel"],
+                condition=Q(user__isnull=True),
+                name="notification_deliveries_event_unique",
+            ),
+        ]
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    version_title = models.CharField(max_length=20)
+    # empty for events
+    user = models.ForeignKey(User, null=True, blank=True, on_delete=models.CASCADE)
+    channel = models.CharField(max_length=20, default=EMAIL)
+    # identifies the rows inserted by one enqueue_notifications() call
+    claim_token = models.UUIDField(editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return (
+            f"{self.project}-{self.version_title} to {self.user or 'everyone'} "
+            f"({self.channel})"
+        )
+
+
+class NotificationJob(models.Model):
+    """
+    A release notification to a user, or an event without a user, through
+    one channel, waiting in the outbox for the ``send_notifications`` worker.
+    """
+
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    # the user has no e-mail address anymore
+    SKIPPED = "skipped"
+    STATUSES = [
+        (PENDING, "Pending"),
+        (SENDING, "Sending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+        (SKIPPED, "Skipped"),
+    ]
+
+    class Meta:
+        db_table = "notification_jobs"
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["version", "user", "channel"],
+                name="notification_jobs_version_user_channel_unique",
+            ),
+            models.UniqueConstraint(
+                fields=["version", "channel"],
+                condition=Q(user__isnull=True),
+                name="notification_jobs_version_channel_event_unique",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["channel", "status", "next_attempt_at"],
+                name="notification_jobs_due_idx",
+            )
+        ]
+
+    version = models.ForeignKey(Version, on_delete=models.CASCADE)
+    # empty for events
+    user = models.ForeignKey(User, null=True, blank=True, on_delete=models.CASCADE)
+    # a key of NOTIFICATION_CHANNELS
+    channel = models.CharField(max_length=20, default=NotificationDelivery.EMAIL)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return (
+            f"{self.version} to {self.user or 'everyone'} via {self.channel} "
+            f"({self.status})"
+        )
+
+
+class FetchRun(models.Model):
+    class Meta:
+        db_table = "fetch_runs"
+        ordering = ["-started_at"]
+
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField()
+    fetched_count = models.PositiveIntegerField(default=0)
+    errors_count = models.PositiveIntegerField(default=0)
+    deferred_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Fetch run at {self.started_at}"
+
+
+class ProjectFetch(models.Model):
+    class Meta:
+        db_table = "project_fetches"
+        ordering = ["-latency"]
+
+    run = models.ForeignKey(
+        FetchRun, on_delete=models.CASCADE, related_name="project_fetches"
+    )
+    project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    requests = models.FloatField(default=0)
+    latency = models.FloatField(default=0)
+    bytes_received = models.FloatField(default=0)
+    releases_seen = models.PositiveIntegerField(default=0)
+    releases_inserted = models.PositiveIntegerField(default=0)
+    rate_limit_remaining = models.IntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.project.title} ({self.run})"
@@ -0,0 +1,271 @@
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from changelogs.channels import (
+    Notification,
+    NotificationChannel,
+    get_channels,
+    is_per_recipient,
+)
+from changelogs.models import (
+    NotificationDelivery,
+    NotificationJob,
+    Project,
+    User,
+    Version,
+)
+
+ENQUEUE_BATCH_SIZE = 500
+
+
+def enqueue_notifications(
+    versions: Iterable[Version], channels: Optional[Dict[str, bool]] = None
+) -> int:
+    """
+    Stores release notifications of the versions in the outbox, for every
+    configured channel or the given ones, with whether they notify every
+    recipient, and returns their number. Called in the transaction which
+    stores the versions.
+
+    Channels which notify every recipient get a job per project subscriber
+    with an e-mail address, other channels one job per version of a project
+    with subscribers.
+
+    Every notification is first recorded in the delivery ledger. Rows which
+    are already there, because the version was enqueued by another path or
+    worker or was stored before, are skipped by the unique constraints, and
+    only the rows inserted by this call get a job. It takes at most four
+    queries for any number of versions and subscribers.
+    """
+    versions = list(versions)
+    if channels is None:
+        channels = {
+            name: is_per_recipient(name) for name in settings.NOTIFICATION_CHANNELS
+        }
+    if not versions or not channels:
+        return 0
+    recipients: Dict[int, List[int]] = {}
+    for project_id, user_id, email in Project.subscribers.through.objects.filter(
+        project_id__in={version.project_id for version in versions}
+    ).values_list("project_id", "user_id", "user__email"):
+        project_recipients = recipients.setdefault(project_id, [])
+        if email:
+            project_recipients.append(user_id)
+
+    notifications: List[Tuple[Version, Optional[int], str]] = []
+    for channel, per_recipient in channels.items():
+        for version in versions:
+            if version.project_id not in recipients:
+                continue
+            if per_recipient:
+                notifications.extend(
+                    (version, user_id, channel)
+                    for user_id in recipients[version.project_id]
+                )
+            else:
+                notifications.append((version, None, channel))
+
+    claim_token = uuid.uuid4()
+    NotificationDelivery.objects.bulk_create(
+        [
+            NotificationDelivery(
+                project_id=version.project_id,
+                version_title=version.title,
+                user_id=user_id,
+                channel=channel,
+                claim_token=claim_token,
+            )
+            for version, user_id, channel in notifications
+        ],
+        batch_size=ENQUEUE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    claimed = set(
+        NotificationDelivery.objects.filter(claim_token=claim_token).values_list(
+            "project_id", "version_title", "user_id", "channel"
+        )
+    )
+    jobs = [
+        NotificationJob(version=version, user_id=user_id, channel=channel)
+        for version, user_id, channel in notifications
+        if (version.project_id, version.title, user_id, channel) in claimed
+    ]
+    NotificationJob.objects.bulk_create(
+        jobs, batch_size=ENQUEUE_BATCH_SIZE, ignore_conflicts=True
+    )
+    return len(jobs)
+
+
+def enqueue_missing_notifications(since: datetime) -> int:
+    """
+    Enqueues release notifications of the versions stored since the given
+    time which no path has enqueued yet, like the versions stored with
+    ``bulk_create()`` or ``loaddata``. Returns the number of new ones.
+    """
+    versions = Version.objects.filter(created_at__gte=since).only(
+        "id", "title", "project_id"
+    )
+    count = 0
+    last_id = 0
+    while True:
+        chunk = list(
+            versions.filter(id__gt=last_id).order_by("id")[:ENQUEUE_BATCH_SIZE]
+        )
+        if not chunk:
+            return count
+        with transaction.atomic():
+            count += enqueue_notifications(chunk)
+        last_id = chunk[-1].id
+
+
+def render_message_html(version: Version) -> str:
+    return f"""<h1>{version.project.title}-{version.title}</h1>
+            {version.body_html}"""
+
+
+def build_notification(
+    version: Version, html: str, recipients: List[str]
+) -> Notification:
+    return Notification(
+        subject=f"{version.project.title}-{version.title} released",
+        html=html,
+        versions=[version],
+        recipients=recipients,
+    )
+
+
+def claim_jobs(channel: str, limit: int) -> List[NotificationJob]:
+    """
+    Marks up to ``limit`` due jobs of the channel as being sent and returns
+    them. Events are sent right away, users' notifications unless they get
+    digests.
+
+    Rows are locked with SKIP LOCKED, so concurrent workers claim different
+    jobs, and are only locked while being claimed, not while being sent.
+    """
+    now = timezone.now()
+    due = Q(status=NotificationJob.PENDING, next_attempt_at__lte=now) | Q(
+        status=NotificationJob.SENDING,
+        locked_at__lt=now - settings.NOTIFICATION_LOCK_TIMEOUT,
+    )
+    with transaction.atomic():
+        ids = list(
+            NotificationJob.objects.select_for_update(skip_locked=True, of=("self",))
+            .filter(
+                Q(user__isnull=True) | Q(user__notification_frequency=User.IMMEDIATE),
+                due,
+                channel=channel,
+            )
+            .order_by("next_attempt_at")
+            .values_list("id", flat=True)[:limit]
+        )
+        NotificationJob.objects.filter(id__in=ids).update(
+            status=NotificationJob.SENDING, locked_at=now, attempts=F("attempts") + 1
+        )
+    return list(
+        NotificationJob.objects.filter(id__in=ids).select_related(
+            "user", "version__project"
+        )
+    )
+
+
+def _retry_delay(attempts: int):
+    return min(
+        settings.NOTIFICATION_BACKOFF * 2 ** (attempts - 1),
+        settings.NOTIFICATION_MAX_BACKOFF,
+    )
+
+
+Batch = List[NotificationJob]
+
+
+def _batches(jobs: List[NotificationJob], size: int) -> List[Batch]:
+    by_version: Dict[int, Batch] = {}
+    for job in jobs:
+        by_version.setdefault(job.version_id, []).append(job)
+    return [
+        version_jobs[i : i + size]
+        for version_jobs in by_version.values()
+        for i in range(0, len(version_jobs), size)
+    ]
+
+
+def deliver(
+    jobs: List[NotificationJob], channel: NotificationChannel
+) -> List[Tuple[Batch, Optional[str]]]:
+    """
+    Sends the jobs through the channel, one notification per version and up
+    to the channel's batch size of recipients. Every version is rendered
+    once. Returns the batches of jobs with their errors.
+    """
+    versions = {job.version_id: job.version for job in jobs}
+    html = {pk: render_message_html(version) for pk, version in versions.items()}
+    batches = _batches(jobs, channel.batch_size)
+    notifications = [
+        build_notification(
+            versions[batch[0].version_id],
+            html[batch[0].version_id],
+            [job.user.email for job in batch if job.user is not None],
+        )
+        for batch in batches
+    ]
+    return list(zip(batches, channel.send_many(notifications)))
+
+
+def record_delivery(job: NotificationJob, error: Optional[str]) -> None:
+    if error is None:
+        job.status = NotificationJob.SENT
+        job.sent_at = timezone.now()
+        job.last_error = ""
+    elif job.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+        job.status = NotificationJob.FAILED
+        job.last_error = error
+    else:
+        job.status = NotificationJob.PENDING
+        job.next_attempt_at = timezone.now() + _retry_delay(job.attempts)
+        job.last_error = error
+    job.locked_at = None
+
+
+def skip_delivery(job: NotificationJob) -> None:
+    job.status = NotificationJob.SKIPPED
+    job.last_error = "No e-mail address"
+    job.locked_at = None
+
+
+def send_notifications(
+    batch_size: Optional[int] = None,
+    channels: Optional[Dict[str, NotificationChannel]] = None,
+) -> Dict[str, int]:
+    """
+    Sends one batch of due jobs of every channel from the outbox and records
+    their delivery state. Jobs of users who have removed their e-mail address
+    since they were enqueued are skipped, as one blank address would fail the
+    whole batch. Returns the number of jobs by their new status.
+    """
+    counts: Dict[str, int] = {}
+    for name, channel in (get_channels() if channels is None else channels).items():
+        jobs = claim_jobs(name, batch_size or settings.NOTIFICATION_BATCH_SIZE)
+        if not jobs:
+            continue
+        deliverable = []
+        for job in jobs:
+            if job.user is not None and not job.user.email:
+                skip_delivery(job)
+                counts[job.status] = counts.get(job.status, 0) + 1
+            else:
+                deliverable.append(job)
+        for batch, error in deliver(deliverable, channel):
+            for job in batch:
+                record_delivery(job, error)
+                counts[job.status] = counts.get(job.status, 0) + 1
+        NotificationJob.objects.bulk_update(
+            jobs, ["status", "sent_at", "next_attempt_at", "locked_at", "last_error"]
+        )
+    return counts
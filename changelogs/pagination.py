@@ -0,0 +1,71 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from django.db.models import Model, Q, QuerySet
+from django.utils.dateparse import parse_datetime
+
+Cursor = Tuple[datetime, int]
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(date_time: datetime, pk: int) -> str:
+    value = f"{date_time.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        value = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date_time, _, pk = value.rpartition("|")
+        parsed = parse_datetime(date_time)
+        if parsed is None:
+            raise ValueError(date_time)
+        return parsed, int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(f"Invalid cursor {cursor!r}")
+
+
+class KeysetPage:
+    """
+    A page of rows ordered from the newest to the oldest one.
+
+    Rows older than the last one are selected by ``(date_time, id)`` instead
+    of an offset, so every page costs the same index range scan.
+    """
+
+    def __init__(self, items: List[Model], next_cursor: Optional[str]) -> None:
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+def paginate(
+    queryset: QuerySet,
+    cursor: Optional[str],
+    page_size: int,
+    date_field: str = "date_time",
+    id_field: str = "id",
+) -> KeysetPage:
+    queryset = queryset.order_by(f"-{date_field}", f"-{id_field}")
+    if cursor:
+        date_time, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f"{date_field}__lt": date_time})
+            | Q(**{date_field: date_time, f"{id_field}__lt": pk})
+        )
+
+    page = list(queryset[: page_size + 1])
+    next_cursor = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        last = page[-1]
+        next_cursor = encode_cursor(getattr(last, date_field), getattr(last, id_field))
+    return KeysetPage(page, next_cursor)
@@ -0,0 +1,86 @@
+import threading
+import time
+from typing import Dict, Mapping, Optional, Tuple
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.dispatch import receiver
+from django.utils.dateparse import parse_datetime
+
+from changelogs.http_client import upstream_request_finished
+
+RateLimitKey = Tuple[str, str]
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, message: str, reset_at: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.reset_at = reset_at
+
+
+class RateLimitTracker:
+    """
+    Keeps the remaining request budget of every (host, token) pair, as
+    reported by the upstream rate-limit headers and GitHub's GraphQL
+    ``rateLimit`` object.
+    """
+
+    def __init__(self) -> None:
+        self._limits: Dict[RateLimitKey, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, key: RateLimitKey, remaining: int, reset_at: float) -> None:
+        with self._lock:
+            self._limits[key] = (remaining, reset_at)
+
+    def update_from_headers(
+        self, key: RateLimitKey, headers: Mapping[str, str]
+    ) -> None:
+        # GitHub sends X-RateLimit-*, GitLab sends RateLimit-*, both with the
+        # reset time as a unix timestamp
+        for prefix in ("X-RateLimit-", "RateLimit-"):
+            remaining = headers.get(f"{prefix}Remaining")
+            reset = headers.get(f"{prefix}Reset")
+            if remaining is not None and reset is not None:
+                self.update(key, int(remaining), float(reset))
+                return
+
+    def update_from_graphql(
+        self, key: RateLimitKey, rate_limit: Optional[Dict]
+    ) -> None:
+        if rate_limit:
+            reset_at = parse_datetime(rate_limit["resetAt"])
+            if reset_at is not None:
+                self.update(key, rate_limit["remaining"], reset_at.timestamp())
+
+    def reset_at(self, key: RateLimitKey) -> Optional[float]:
+        with self._lock:
+            remaining, reset_at = self._limits.get(key, (None, None))
+        if remaining is None or reset_at is None or reset_at <= time.time():
+            return None
+        if remaining > settings.FETCH_RATE_LIMIT_RESERVE:
+            return None
+        return reset_at
+
+    def clear(self) -> None:
+        with self._lock:
+            self._limits.clear()
+
+
+def _request_token(headers: Mapping[str, str]) -> Optional[str]:
+    if "Private-Token" in headers:
+        return headers["Private-Token"]
+    authorization = headers.get("Authorization", "")
+    if authorization.startswith("Bearer "):
+        return authorization[len("Bearer ") :]
+    return None
+
+
+rate_limits = RateLimitTracker()
+
+
+@receiver(upstream_request_finished)
+def track_rate_limits(sender, url, response=None, request_headers=None, **kwargs):
+    token = _request_token(request_headers or {})
+    if response is not None and token is not None:
+        rate_limits.update_from_headers((urlparse(url).netloc, token), response.headers)
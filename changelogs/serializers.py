@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from rest_framework.validators import UniqueTogetherValidator
 
 from .models import Project, Version
 
@@ -13,3 +14,8 @@ class VersionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Version
         fields = ["id", "title", "date_time", "body", "project"]
+        validators = [
+            UniqueTogetherValidator(
+                queryset=Version.objects.all(), fields=["project", "title"]
+            )
+        ]
@@ -1,38 +1,97 @@
 import json
-from datetime import datetime
-from typing import Dict, List
+from datetime import timedelta
+from typing import Dict, List, Optional, Set, Tuple, Union
 from urllib.parse import urlparse
 
-import requests
 from django.conf import settings
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
-from changelogs.models import Project, Version
+from changelogs.http_client import client
+from changelogs.instrumentation import record_releases
+from changelogs.models import Project, ResponseValidator, Version
+from changelogs.notifications import enqueue_notifications
+from changelogs.rate_limits import RateLimitExceeded, rate_limits
 
+GITHUB_API_DOMAIN_NAME = "api.github.com"
 
-def send_email_notifications(version: Version) -> None:
-    users = version.project.subscribers.all()
 
-    for user in users:
-        message = Mail(
-            from_email=settings.NOREPLY_EMAIL_ADDRESS,
-            to_emails=user.email,
-            subject=f"{version.project.title}-{version.title} released",
-            html_content=(
-                f"""<h1>{version.project.title}-{version.title}</h1>
-                {version.body_html}"""
-            ),
-        )
-        sg = SendGridAPIClient(settings.SENDGRID_API_KEY)
-        sg.send(message)
+INGEST_ATTEMPTS = 3
+
+
+def existing_version_titles(project: Project) -> Set[str]:
+    return set(Version.objects.filter(project=project).values_list("title", flat=True))
+
+
+def ingest_versions(project: Project, versions: List[Version]) -> List[Version]:
+    """
+    Stores the versions which the project doesn't have yet and returns them.
+
+    Concurrent writers are resolved by the unique (project, title) constraint:
+    the one which loses the race reloads the known titles and retries, so
+    ``post_save`` is sent exactly once for every new version. Notifications
+    of all the new versions are enqueued at once rather than by the
+    ``post_save`` receiver.
+    """
+    for _ in range(INGEST_ATTEMPTS):
+        existing_titles = existing_version_titles(project)
+        new_versions: Dict[str, Version] = {}
+        for version in versions:
+            if version.title not in existing_titles:
+                new_versions.setdefault(version.title, version)
+        if not new_versions:
+            return []
+
+        # bulk_create() skips save(), so render the bodies here
+        for version in new_versions.values():
+            version.render()
+        try:
+            with transaction.atomic():
+                Version.objects.bulk_create(new_versions.values())
+                created = list(
+                    Version.objects.filter(
+                        project=project, title__in=list(new_versions)
+                    )
+                )
+                # in the same transaction, like Version.save() does
+                enqueue_notifications(created)
+                for version in created:
+                    post_save.send(
+                        sender=Version,
+                        instance=version,
+                        created=True,
+                        update_fields=None,
+                        raw=False,
+                        using=version._state.db,
+                        notifications_enqueued=True,
+                    )
+        except IntegrityError:
+            continue
+        return created
+
+    raise IntegrityError(f"Failed to store versions of {project}")
+
+
+def _rate_limit_reset(headers) -> Optional[float]:
+    reset = headers.get("X-RateLimit-Reset") or headers.get("RateLimit-Reset")
+    return float(reset) if reset else None
 
 
 def _run_graphql_query(query: str, url: str, token: str) -> dict:
     headers = {"Authorization": f"Bearer {token}"}
-    request = requests.post(url, json={"query": query}, headers=headers)
+    request = client.post(url, json={"query": query}, headers=headers)
     if request.status_code == 200:
         return request.json()
+    elif request.status_code in (403, 429) and (
+        request.status_code == 429
+        or request.headers.get("X-RateLimit-Remaining") == "0"
+    ):
+        raise RateLimitExceeded(
+            f"Rate limit of {urlparse(url).netloc} exceeded",
+            _rate_limit_reset(request.headers),
+        )
     else:
         raise Exception(
             "Query failed to run by returning code of {}. {}".format(
@@ -41,79 +100,421 @@ def _run_graphql_query(query: str, url: str, token: str) -> dict:
         )
 
 
-def fetch_github_project(project: Project) -> None:
-    query = """
-    {
-      repository(owner: "%s", name: "%s") {
-        releases(last: 10) {
+def _release_cadence(project: Project) -> timedelta:
+    date_times = list(
+        Version.objects.filter(project=project)
+        .order_by("-date_time")
+        .values_list("date_time", flat=True)[: settings.FETCH_CADENCE_RELEASES]
+    )
+    if len(date_times) < 2:
+        return settings.FETCH_DEFAULT_INTERVAL
+    gaps = sorted(newer - older for newer, older in zip(date_times, date_times[1:]))
+    return gaps[len(gaps) // 2]
+
+
+def _save_fetch_state(
+    project: Project,
+    releases_cursor: str,
+    versions: List[Version],
+    created: List[Version],
+) -> None:
+    """
+    Stores the project's high-water marks and schedules its next fetch.
+
+    Projects are polled several times per their usual gap between releases,
+    and the interval doubles with every fetch which finds nothing new.
+    """
+    record_releases(project, len(versions), len(created))
+    last_released_at = max(
+        [version.date_time for version in versions]
+        + ([project.last_released_at] if project.last_released_at else []),
+        default=None,
+    )
+    if created or project.fetch_interval is None:
+        project.fetch_interval = min(
+            max(
+                _release_cadence(project) / settings.FETCH_POLLS_PER_RELEASE,
+                settings.FETCH_MIN_INTERVAL,
+            ),
+            settings.FETCH_MAX_INTERVAL,
+        )
+    project.unchanged_fetch_count = 0 if created else project.unchanged_fetch_count + 1
+    project.releases_cursor = releases_cursor
+    project.last_released_at = last_released_at
+    project.next_fetch_at = timezone.now() + min(
+        project.fetch_interval * 2 ** min(project.unchanged_fetch_count, 10),
+        settings.FETCH_MAX_INTERVAL,
+    )
+    Project.objects.filter(pk=project.pk).update(
+        releases_cursor=project.releases_cursor,
+        last_released_at=project.last_released_at,
+        fetch_interval=project.fetch_interval,
+        unchanged_fetch_count=project.unchanged_fetch_count,
+        next_fetch_at=project.next_fetch_at,
+    )
+
+
+def _get_github_repository_query(alias: str, project: Project, cursor: str) -> str:
+    if cursor:
+        window = 'first: %d, after: "%s"' % (settings.FETCH_RELEASES_PAGE_SIZE, cursor)
+    else:
+        window = "last: %d" % settings.FETCH_RELEASES_PAGE_SIZE
+    return """
+      %s: repository(owner: "%s", name: "%s") {
+        releases(%s, orderBy: {field: CREATED_AT, direction: ASC}) {
           edges {
+            cursor
             node {
               tagName
+              createdAt
               publishedAt
               description
             }
           }
+          pageInfo {
+            hasNextPage
+            endCursor
+          }
         }
       }
-    }
     """ % (
+        alias,
         project.repository_owner,
         project.repository_name,
+        window,
     )
 
-    response = _run_graphql_query(
-        query, "https://api.github.com/graphql", project.owner.github_token
+
+def get_github_batch_size() -> int:
+    # every repository in a batch may ask for a full page of releases
+    return max(
+        1,
+        min(
+            settings.FETCH_GITHUB_BATCH_SIZE,
+            settings.FETCH_GITHUB_MAX_BATCH_NODES // settings.FETCH_RELEASES_PAGE_SIZE,
+        ),
+    )
+
+
+def _is_pending_draft(release: Dict) -> bool:
+    # drafts may still be published, older ones are considered abandoned
+    return (
+        not release["publishedAt"]
+        and parse_datetime(release["createdAt"])
+        > timezone.now() - settings.FETCH_DRAFT_MAX_AGE
     )
 
-    releases: List[Dict] = response["data"]["repository"]["releases"]["edges"]
-
-    for release in releases:
-        if not Version.objects.filter(
-            project=project, title=release["node"]["tagName"]
-        ).exists():
-            Version.objects.create(
-                title=release["node"]["tagName"],
-                date_time=datetime.strptime(
-                    release["node"]["publishedAt"], "%Y-%m-%dT%H:%M:%SZ"
-                ),
-                project=project,
-                body=release["node"]["description"],
+
+def _store_github_releases(
+    project: Project, releases: List[Dict], cursor: str
+) -> List[Version]:
+    versions = [
+        Version(
+            title=release["tagName"],
+            date_time=parse_datetime(release["publishedAt"]),
+            project=project,
+            body=release["description"] or "",
+        )
+        for release in releases
+        # drafts aren't published yet
+        if release["publishedAt"]
+    ]
+    created = ingest_versions(project, versions)
+    _save_fetch_state(project, cursor, versions, created)
+    return created
+
+
+def _fetch_github_batch(
+    projects: List[Project], token: str
+) -> Dict[Project, Union[List[Version], Exception]]:
+    results: Dict[Project, Union[List[Version], Exception]] = {}
+    releases: Dict[Project, List[Dict]] = {project: [] for project in projects}
+    cursors = {project: project.releases_cursor for project in projects}
+    # the stored cursors don't move past pending drafts, which are fetched
+    # again until they are published
+    stored_cursors = dict(cursors)
+    held: Set[Project] = set()
+
+    pending = list(projects)
+    for _ in range(settings.FETCH_MAX_RELEASE_PAGES):
+        if not pending:
+            break
+        query = "{rateLimit { remaining resetAt cost } %s}" % "".join(
+            _get_github_repository_query(f"r{index}", project, cursors[project])
+            for index, project in enumerate(pending)
+        )
+        try:
+            response = _run_graphql_query(
+                query, f"https://{GITHUB_API_DOMAIN_NAME}/graphql", token
             )
+        except Exception as e:
+            results.update((project, e) for project in pending)
+            break
 
+        data = response.get("data") or {}
+        rate_limits.update_from_graphql(
+            (GITHUB_API_DOMAIN_NAME, token), data.get("rateLimit")
+        )
+        if any(
+            error.get("type") == "RATE_LIMITED" for error in response.get("errors", [])
+        ):
+            rate_limit_error = RateLimitExceeded(
+                "Rate limit of GitHub exceeded",
+                rate_limits.reset_at((GITHUB_API_DOMAIN_NAME, token)),
+            )
+            results.update((project, rate_limit_error) for project in pending)
+            break
 
-def _get_gitlab_project_id(project: Project) -> int:
-    query = """
-        query {
-            project(fullPath: "%s") {
-                id
-            }
+        errors = {
+            error["path"][0]: error["message"]
+            for error in response.get("errors", [])
+            if error.get("path")
         }
-    """ % (
-        urlparse(project.url).path[1:]
+        next_pending = []
+        for index, project in enumerate(pending):
+            alias = f"r{index}"
+            if data.get(alias) is None:
+                results[project] = Exception(
+                    errors.get(alias, f"Failed to fetch releases of {project}")
+                )
+                continue
+            page = data[alias]["releases"]
+            releases[project].extend(edge["node"] for edge in page["edges"])
+            cursors[project] = page["pageInfo"]["endCursor"] or cursors[project]
+            for edge in page["edges"]:
+                if project in held:
+                    break
+                if _is_pending_draft(edge["node"]):
+                    held.add(project)
+                else:
+                    stored_cursors[project] = edge["cursor"]
+            if project not in held:
+                stored_cursors[project] = cursors[project]
+            if page["pageInfo"]["hasNextPage"]:
+                next_pending.append(project)
+        pending = next_pending
+
+    for project in projects:
+        if project in results:
+            continue
+        try:
+            results[project] = _store_github_releases(
+                project, releases[project], stored_cursors[project]
+            )
+        except Exception as e:
+            results[project] = e
+    return results
+
+
+def fetch_github_projects(
+    projects: List[Project], batch_size: Optional[int] = None
+) -> Dict[Project, Union[List[Version], Exception]]:
+    """
+    Fetches releases of many GitHub projects, packing the repositories which
+    share an access token into batched GraphQL queries.
+
+    Errors are returned per project instead of being raised.
+    """
+    by_token: Dict[str, List[Project]] = {}
+    for project in projects:
+        by_token.setdefault(project.owner.github_token, []).append(project)
+
+    batch_size = batch_size or get_github_batch_size()
+    results: Dict[Project, Union[List[Version], Exception]] = {}
+    for token, token_projects in by_token.items():
+        for start in range(0, len(token_projects), batch_size):
+            results.update(
+                _fetch_github_batch(token_projects[start : start + batch_size], token)
+            )
+    return results
+
+
+def fetch_github_project(project: Project) -> List[Version]:
+    result = fetch_github_projects([project])[project]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+def _resolve_gitlab_project_ids(
+    projects: List[Project], token: str
+) -> Dict[Project, Exception]:
+    query = "query {%s}" % "".join(
+        'p%d: project(fullPath: "%s") { id }' % (index, urlparse(project.url).path[1:])
+        for index, project in enumerate(projects)
     )
     response = _run_graphql_query(
-        query,
-        f"https://{urlparse(project.url).netloc}/api/graphql",
-        project.owner.gitlab_token,
+        query, f"https://{projects[0].host}/api/graphql", token
     )
-    return int(response["data"]["project"]["id"].split("/")[-1])
 
+    errors: Dict[Project, Exception] = {}
+    data = response.get("data") or {}
+    for index, project in enumerate(projects):
+        if data.get(f"p{index}") is None:
+            errors[project] = Exception(f"Failed to resolve GitLab project {project}")
+            continue
+        project.gitlab_project_id = int(data[f"p{index}"]["id"].split("/")[-1])
+        Project.objects.filter(pk=project.pk).update(
+            gitlab_project_id=project.gitlab_project_id
+        )
+    return errors
 
-def _get_gitlab_project_releases(project: Project) -> List[Dict]:
-    r = requests.get(
-        f"https://{urlparse(project.url).netloc}/api/v4/projects/{_get_gitlab_project_id(project)}/releases",
-        headers={"Private-Token": project.owner.gitlab_token},
-    )
-    data = json.loads(r.content.decode("utf8"))
-    return data
-
-
-def fetch_gitlab_project(project: Project) -> None:
-    for release in _get_gitlab_project_releases(project):
-        if not Version.objects.filter(project=project, title=release["name"]).exists():
-            Version.objects.create(
-                title=release["name"],
-                date_time=datetime.fromisoformat(release["released_at"]),
-                project=project,
-                body=release["description"],
+
+def _get_gitlab_project_releases(
+    project: Project, validator: ResponseValidator
+) -> Optional[List[Dict]]:
+    """
+    Returns releases newer than the project's high-water mark, or ``None`` if
+    the first page hasn't changed since the validator was last updated.
+    """
+    page_size = settings.FETCH_RELEASES_PAGE_SIZE
+    releases: List[Dict] = []
+    for page in range(1, settings.FETCH_MAX_RELEASE_PAGES + 1):
+        headers = {"Private-Token": project.owner.gitlab_token}
+        if page == 1:
+            headers.update(validator.request_headers)
+        r = client.get(
+            validator.url,
+            params={
+                "order_by": "released_at",
+                "sort": "desc",
+                "per_page": page_size,
+                "page": page,
+            },
+            headers=headers,
+        )
+        if r.status_code == 304:
+            return None
+        if r.status_code == 429:
+            raise RateLimitExceeded(
+                f"Rate limit of {project.host} exceeded", _rate_limit_reset(r.headers),
+            )
+        if r.status_code != 200:
+            raise Exception(
+                f"Failed to fetch releases of {project}, got {r.status_code}"
             )
+        if page == 1:
+            validator.update_from_headers(r.headers)
+        data = json.loads(r.content.decode("utf8"))
+        releases.extend(data)
+        if (
+            project.last_released_at is None
+            or len(data) < page_size
+            or any(
+                parse_datetime(release["released_at"]) <= project.last_released_at
+                for release in data
+            )
+        ):
+            break
+    return releases
+
+
+def _store_gitlab_releases(project: Project) -> List[Version]:
+    url = f"https://{project.host}/api/v4/projects/{project.gitlab_project_id}/releases"
+    validator = ResponseValidator.objects.filter(
+        project=project, url=url
+    ).first() or ResponseValidator(project=project, url=url)
+
+    releases = _get_gitlab_project_releases(project, validator)
+    if releases is None:
+        _save_fetch_state(project, project.releases_cursor, [], [])
+        return []
+
+    versions = [
+        Version(
+            title=release["name"],
+            date_time=parse_datetime(release["released_at"]),
+            project=project,
+            body=release["description"] or "",
+        )
+        for release in releases
+    ]
+    created = ingest_versions(project, versions)
+    _save_fetch_state(project, project.releases_cursor, versions, created)
+    # validators are stored only once the releases are, so that a failed
+    # ingestion isn't skipped as "not modified" next time
+    if validator.pk or validator.etag or validator.last_modified:
+        validator.save()
+    return created
+
+
+def fetch_gitlab_projects(
+    projects: List[Project],
+) -> Dict[Project, Union[List[Version], Exception]]:
+    """
+    Fetches releases of many GitLab projects.
+
+    Numeric ids of the projects are stored once resolved, and the unknown ones
+    are resolved with one GraphQL query per host and token, so every project
+    costs a single releases request afterwards. Errors are returned per
+    project instead of being raised.
+    """
+    unresolved: Dict[Tuple[str, str], List[Project]] = {}
+    for project in projects:
+        if project.gitlab_project_id is None:
+            key = (project.host, project.owner.gitlab_token)
+            unresolved.setdefault(key, []).append(project)
+
+    results: Dict[Project, Union[List[Version], Exception]] = {}
+    for (_, token), unresolved_projects in unresolved.items():
+        try:
+            results.update(_resolve_gitlab_project_ids(unresolved_projects, token))
+        except Exception as e:
+            results.update((project, e) for project in unresolved_projects)
+
+    for project in projects:
+        if project in results:
+            continue
+        try:
+            results[project] = _store_gitlab_releases(project)
+        except Exception as e:
+            results[project] = e
+    return results
+
+
+def fetch_gitlab_project(project: Project) -> List[Version]:
+    result = fetch_gitlab_projects([project])[project]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+def _projects_by_url(url: str):
+    return Project.objects.select_related("owner").filter(url__iexact=url.rstrip("/"))
+
+
+def ingest_github_release_event(payload: Dict) -> List[Version]:
+    release = payload["release"]
+    created: List[Version] = []
+    for project in _projects_by_url(payload["repository"]["html_url"]):
+        created += ingest_versions(
+            project,
+            [
+                Version(
+                    title=release["tag_name"],
+                    date_time=parse_datetime(release["published_at"]),
+                    project=project,
+                    body=release["body"] or "",
+                )
+            ],
+        )
+    return created
+
+
+def ingest_gitlab_release_event(payload: Dict) -> List[Version]:
+    # release hooks send dates like "2020-11-11 11:40:22 UTC"
+    released_at = parse_datetime(payload["released_at"].replace(" UTC", "+00:00"))
+    created: List[Version] = []
+    for project in _projects_by_url(payload["project"]["web_url"]):
+        created += ingest_versions(
+            project,
+            [
+                Version(
+                    title=payload["name"],
+                    date_time=released_at,
+                    project=project,
+                    body=payload["description"] or "",
+                )
+            ],
+        )
+    return created
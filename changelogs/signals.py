@@ -1,10 +1,13 @@
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
 from rest_framework.authtoken.models import Token
 
-from changelogs.models import Version
-from changelogs.services import send_email_notifications
+from changelogs.fragment_cache import invalidate_version_cards
+from changelogs.models import Project, ResponseValidator, TimelineEntry, Version
+from changelogs.notifications import enqueue_notifications
+from changelogs.timeline import backfill, fan_out_version, is_timeline_enabled, prune
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
@@ -14,6 +17,88 @@ def create_auth_token(sender, instance=None, created=False, **kwargs):
 
 
 @receiver(post_save, sender=Version)
-def send_notifications(sender, instance=None, created=False, **kwargs):
-    if created and not settings.DEBUG and settings.SENDGRID_API_KEY:
-        send_email_notifications(version=instance)
+def send_notifications(
+    sender,
+    instance=None,
+    created=False,
+    raw=False,
+    notifications_enqueued=False,
+    **kwargs,
+):
+    # fixtures are enqueued by the enqueue_notifications command, ingested
+    # versions together by ingest_versions()
+    if created and not raw and not notifications_enqueued:
+        enqueue_notifications([instance])
+
+
+@receiver(pre_save, sender=Project)
+def reset_fetch_state(sender, instance=None, **kwargs):
+    if instance.pk is None:
+        return
+    previous_url = (
+        Project.objects.filter(pk=instance.pk).values_list("url", flat=True).first()
+    )
+    if previous_url is not None and previous_url != instance.url:
+        instance.releases_cursor = ""
+        instance.last_released_at = None
+        instance.gitlab_project_id = None
+        instance.next_fetch_at = None
+        instance.fetch_interval = None
+        instance.unchanged_fetch_count = 0
+        ResponseValidator.objects.filter(project=instance).delete()
+        # image links in the rendered bodies point to the previous URL. The
+        # new updated_at also invalidates cards cached by other processes.
+        Version.objects.filter(project=instance).update(
+            renderer_version=0, updated_at=timezone.now()
+        )
+
+
+@receiver(post_save, sender=Version)
+@receiver(post_delete, sender=Version)
+def invalidate_version_card(sender, instance=None, **kwargs):
+    invalidate_version_cards([instance.pk])
+
+
+# deleting a project deletes its versions, which invalidates their cards
+@receiver(post_save, sender=Project)
+def invalidate_project_version_cards(sender, instance=None, **kwargs):
+    invalidate_version_cards(
+        Version.objects.filter(project=instance).values_list("id", flat=True)
+    )
+
+
+@receiver(post_save, sender=Version)
+def update_timelines(sender, instance=None, created=False, **kwargs):
+    if not is_timeline_enabled():
+        return
+    if created:
+        fan_out_version(instance)
+    else:
+        TimelineEntry.objects.filter(version=instance).update(
+            date_time=instance.date_time
+        )
+
+
+@receiver(m2m_changed, sender=Project.subscribers.through)
+def update_subscriber_timelines(
+    sender, instance=None, action=None, reverse=False, pk_set=None, **kwargs
+):
+    if not is_timeline_enabled():
+        return
+    if action == "pre_clear":
+        # pk_set is not given for clear(), so prune before the rows are gone.
+        # "subscribers" names both sides: the users of a project and the
+        # projects of a user
+        pk_set = set(instance.subscribers.values_list("id", flat=True))
+        action = "post_remove"
+    if action not in ("post_add", "post_remove") or not pk_set:
+        return
+
+    if reverse:
+        user_ids, project_ids = [instance.pk], pk_set
+    else:
+        user_ids, project_ids = pk_set, [instance.pk]
+    if action == "post_add":
+        backfill(user_ids, project_ids)
+    else:
+        prune(user_ids, project_ids)
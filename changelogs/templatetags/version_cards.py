@@ -0,0 +1,10 @@
+from django import template
+
+from changelogs.fragment_cache import render_version_card
+
+register = template.Library()
+
+
+@register.simple_tag
+def version_card(version):
+    return render_version_card(version)
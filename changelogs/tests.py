@@ -1,15 +1,75 @@
 import datetime
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
 
 import pytz
+import requests
 from django.contrib.auth.models import Group, Permission
-from django.core.exceptions import ValidationError
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
 from django.db.models.deletion import ProtectedError
-from django.test import SimpleTestCase, TestCase
+from django.db.models.signals import post_save
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from changelogs.models import Project, User, Version
+from changelogs.channels import (
+    ConsoleChannel,
+    FileChannel,
+    InMemoryChannel,
+    Notification,
+    SlackChannel,
+    WebhookChannel,
+    get_channel,
+)
+from changelogs.digests import send_digests
+from changelogs.fetcher import ProjectFetcher
+from changelogs.fragment_cache import render_version_card, version_card_stats
+from changelogs.http_client import HttpClient, client, upstream_request_finished
+from changelogs.instrumentation import percentile, record_releases
+from changelogs.models import (
+    MARKDOWN_RENDERER_VERSION,
+    FetchRun,
+    NotificationDelivery,
+    NotificationJob,
+    Project,
+    ProjectFetch,
+    TimelineEntry,
+    User,
+    Version,
+)
+from changelogs.notifications import (
+    enqueue_notifications,
+    render_message_html,
+    send_notifications,
+)
+from changelogs.rate_limits import RateLimitExceeded, rate_limits
+from changelogs.services import (
+    fetch_github_project,
+    fetch_github_projects,
+    fetch_gitlab_project,
+    fetch_gitlab_projects,
+    ingest_versions,
+)
 from changelogs.validators import validate_project_url
 
 
@@ -79,6 +139,372 @@ class SubscriptionsViewTests(TestCase):
         self.assertRedirects(response, "/login/?next=/subscriptions/")
 
 
+class FeedViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="jacob", email="jacob@mail.com", password="top_secret"
+        )
+        self.project = Project.objects.create(
+            title="django", url="https://github.com/django/django", owner=self.user
+        )
+        self.project.subscribers.add(self.user)
+        released_at = datetime.datetime(2020, 1, 1, tzinfo=pytz.utc)
+        for i in range(5):
+            Version.objects.create(
+                title=f"1.{i}",
+                # two versions released at the same time
+                date_time=released_at + datetime.timedelta(days=min(i, 3)),
+                project=self.project,
+                body=f"release 1.{i}",
+            )
+
+    def _feed_titles(self):
+        self.client.login(username="jacob", password="top_secret")
+        titles = []
+        params = {}
+        while params is not None:
+            response = self.client.get(reverse("changelogs:feed"), params)
+            self.assertEqual(response.status_code, 200)
+            page = response.context["page"]
+            self.assertLessEqual(len(page.items), 2)
+            titles.extend(version.title for version in page.items)
+            params = {"before": page.next_cursor} if page.has_next else None
+        self.assertNotContains(response, "Older")
+        return titles
+
+    @override_settings(FEED_PAGE_SIZE=2)
+    def test_pages(self):
+        self.assertEqual(self._feed_titles(), ["1.4", "1.3", "1.2", "1.1", "1.0"])
+
+    @override_settings(FEED_PAGE_SIZE=2, FEED_MODE="timeline")
+    def test_timeline_pages(self):
+        out = StringIO()
+        call_command("rebuild_timeline", "jacob", stdout=out)
+        self.assertIn("5 entries", out.getvalue())
+        self.assertEqual(self._feed_titles(), ["1.4", "1.3", "1.2", "1.1", "1.0"])
+
+    @override_settings(FEED_MODE="timeline")
+    def test_timeline_updates(self):
+        entries = TimelineEntry.objects.filter(user=self.user)
+        self.project.subscribers.remove(self.user)
+        self.assertFalse(entries.exists())
+        self.user.subscribers.add(self.project)
+        self.assertEqual(entries.count(), 5)
+
+        version = Version.objects.create(
+            title="2.0",
+            date_time=datetime.datetime(2021, 1, 1, tzinfo=pytz.utc),
+            project=self.project,
+            body="release 2.0",
+        )
+        self.assertEqual(entries.count(), 6)
+        version.date_time = datetime.datetime(2021, 2, 1, tzinfo=pytz.utc)
+        version.save()
+        self.assertEqual(entries.get(version=version).date_time, version.date_time)
+
+        self.project.subscribers.clear()
+        self.assertFalse(entries.exists())
+
+    @override_settings(FEED_MODE="timeline")
+    def test_timeline_queries(self):
+        call_command("rebuild_timeline", stdout=StringIO())
+        self.client.login(username="jacob", password="top_secret")
+        # session, user, timeline entries, versions with their projects
+        with self.assertNumQueries(4):
+            self.client.get(reverse("changelogs:feed"))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("changelogs:feed"), {"before": "abc"})
+        self.assertEqual(response.status_code, 400)
+
+
+class QueryCountTests(TestCase):
+    def setUp(self):
+        caches["fragments"].clear()
+        self.addCleanup(caches["fragments"].clear)
+        self.user = User.objects.create_user(
+            username="jacob", email="jacob@mail.com", password="top_secret"
+        )
+        self.project = Project.objects.create(
+            title="django", url="https://github.com/django/django", owner=self.user
+        )
+        self.client.login(username="jacob", password="top_secret")
+
+    def _add_versions(self, count):
+        for _ in range(count):
+            project = Project.objects.create(
+                title="flask",
+                url="https://github.com/pallets/flask",
+                owner=self.user,
+                is_public=True,
+            )
+            project.subscribers.add(self.user)
+            for title in ("1.0", "1.1"):
+                for versions_project in (project, self.project):
+                    Version.objects.create(
+                        title=f"{title}-{project.id}",
+                        date_time=timezone.now(),
+                        project=versions_project,
+                        body="![image](/logo.png)",
+                    )
+
+    def _assert_num_queries(self, num, url):
+        for count in (1, 5):
+            self._add_versions(count)
+            with self.assertNumQueries(num):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_feed(self):
+        # session, user, versions with their projects
+        self._assert_num_queries(3, reverse("changelogs:feed"))
+
+    def test_project_detail(self):
+        # session, user, project, versions state, latest versions
+        self._assert_num_queries(
+            5, reverse("changelogs:project_detail", args=(self.project.id,))
+        )
+
+    def test_project_versions(self):
+        # session, user, project, versions state, versions
+        self._assert_num_queries(
+            5, reverse("changelogs:project_versions", args=(self.project.id,))
+        )
+
+    def test_version_detail(self):
+        self._add_versions(1)
+        version = Version.objects.filter(project=self.project).first()
+        with self.assertNumQueries(4):
+            self.client.get(
+                reverse("changelogs:version_detail", args=(self.project.id, version.id))
+            )
+
+
+class SyndicationFeedsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="jacob", email="jacob@mail.com", password="top_secret"
+        )
+        self.project = Project.objects.create(
+            title="django",
+            url="https://github.com/django/django",
+            owner=self.user,
+            is_public=True,
+        )
+        self.project.subscribers.add(self.user)
+        for i in range(3):
+            Version.objects.create(
+                title=f"1.{i}",
+                date_time=datetime.datetime(2020, 1, 1 + i, tzinfo=pytz.utc),
+                project=self.project,
+                body=f"**release 1.{i}**",
+            )
+
+    @override_settings(FEED_MAX_ITEMS=2)
+    def test_project_feeds(self):
+        for name in ("changelogs:project_rss_feed", "changelogs:project_atom_feed"):
+            response = self.client.get(reverse(name, args=(self.project.id,)))
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, "django 1.2")
+            self.assertContains(response, "django 1.1")
+            self.assertNotContains(response, "django 1.0")
+            self.assertContains(response, "&lt;strong&gt;release 1.2&lt;/strong&gt;")
+            response = self.client.get(
+                reverse(name, args=(self.project.id,)),
+                HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+            )
+            self.assertEqual(response.status_code, 304)
+
+    def test_private_project_feed(self):
+        self.project.is_public = False
+        self.project.save()
+        response = self.client.get(
+            reverse("changelogs:project_rss_feed", args=(self.project.id,))
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_user_feed(self):
+        url = reverse("changelogs:user_atom_feed", args=(self.user.feed_token,))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "django 1.0")
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+        self.project.subscribers.remove(self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "django 1.0")
+
+        response = self.client.get(reverse("changelogs:user_rss_feed", args=("wrong",)))
+        self.assertEqual(response.status_code, 404)
+        # the API token doesn't give access to the feed
+        response = self.client.get(
+            reverse("changelogs:user_rss_feed", args=(self.user.auth_token.key,))
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_regenerate_feed_token(self):
+        feed_token = self.user.feed_token
+        self.client.login(username="jacob", password="top_secret")
+        response = self.client.get(reverse("changelogs:profile"))
+        self.assertContains(
+            response, reverse("changelogs:user_rss_feed", args=(feed_token,))
+        )
+        self.assertNotContains(response, f"/feed/{self.user.auth_token.key}/")
+
+        response = self.client.post(reverse("changelogs:regenerate_feed_token"))
+        self.assertRedirects(response, reverse("changelogs:profile"))
+        self.user.refresh_from_db()
+        self.assertNotEqual(self.user.feed_token, feed_token)
+        response = self.client.get(
+            reverse("changelogs:user_rss_feed", args=(feed_token,))
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class ConditionalPagesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="jacob", email="jacob@mail.com", password="top_secret"
+        )
+        self.project = Project.objects.create(
+            title="django",
+            url="https://github.com/django/django",
+            owner=self.user,
+            is_public=True,
+        )
+        self.version = Version.objects.create(
+            title="1.0",
+            date_time=datetime.datetime(2020, 1, 1, tzinfo=pytz.utc),
+            project=self.project,
+            body="release 1.0",
+        )
+        self.urls = [
+            reverse("changelogs:project_detail", args=(self.project.id,)),
+            reverse("changelogs:project_versions", args=(self.project.id,)),
+            reverse(
+                "changelogs:version_detail", args=(self.project.id, self.version.id)
+            ),
+        ]
+
+    def test_not_modified(self):
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("public", response["Cache-Control"])
+            self.assertIn("max-age=60", response["Cache-Control"])
+
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(response.status_code, 304)
+            response = self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+            )
+            self.assertEqual(response.status_code, 304)
+
+    def test_modified(self):
+        etags = [self.client.get(url)["ETag"] for url in self.urls]
+        self.version.body = "release 1.0.1"
+        self.version.save()
+        for url, etag in zip(self.urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+
+    def test_signed_in_viewer(self):
+        etags = [self.client.get(url)["ETag"] for url in self.urls]
+        self.client.login(username="jacob", password="top_secret")
+        for url, etag in zip(self.urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("private", response["Cache-Control"])
+            self.assertIn("no-cache", response["Cache-Control"])
+
+    def test_staff_viewer(self):
+        self.client.login(username="jacob", password="top_secret")
+        etags = [self.client.get(url)["ETag"] for url in self.urls]
+        User.objects.filter(username="jacob").update(is_staff=True)
+        for url, etag in zip(self.urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, "Site administration")
+
+    def test_private_project(self):
+        self.project.is_public = False
+        self.project.save()
+        response = self.client.get(self.urls[0], HTTP_IF_NONE_MATCH="*")
+        self.assertEqual(response.status_code, 404)
+
+
+class ProjectVersionsViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="jacob", email="jacob@mail.com", password="top_secret"
+        )
+        self.project = Project.objects.create(
+            title="django", url="https://github.com/django/django", owner=self.user
+        )
+        for i in range(5):
+            Version.objects.create(
+                title=f"1.{i}",
+                date_time=datetime.datetime(2020, 1, 1 + i, tzinfo=pytz.utc),
+                project=self.project,
+                body=f"release 1.{i}",
+            )
+        self.client.login(username="jacob", password="top_secret")
+
+    def test_anonymous(self):
+        self.client.logout()
+        for name in ("changelogs:project_versions", "changelogs:project_versions_page"):
+            response = self.client.get(reverse(name, args=(self.project.id,)))
+            self.assertEqual(response.status_code, 404)
+
+        self.project.is_public = True
+        self.project.save()
+        for name in ("changelogs:project_versions", "changelogs:project_versions_page"):
+            response = self.client.get(reverse(name, args=(self.project.id,)))
+            self.assertContains(response, "release 1.4")
+
+    @override_settings(PROJECT_VERSIONS_PAGE_SIZE=2)
+    def test_pages(self):
+        response = self.client.get(
+            reverse("changelogs:project_versions", args=(self.project.id,))
+        )
+        self.assertEqual(
+            [version.title for version in response.context["versions"]], ["1.4", "1.3"],
+        )
+        self.assertContains(response, "js-load-more")
+
+        titles = []
+        page = response.context["page"]
+        while page.has_next:
+            response = self.client.get(
+                reverse("changelogs:project_versions_page", args=(self.project.id,)),
+                {"before": page.next_cursor},
+            )
+            self.assertNotContains(response, "<html")
+            page = response.context["page"]
+            titles.extend(version.title for version in page.items)
+        self.assertEqual(titles, ["1.2", "1.1", "1.0"])
+        self.assertNotContains(response, "js-load-more")
+
+    def test_not_modified(self):
+        url = reverse("changelogs:project_versions", args=(self.project.id,))
+        etag = self.client.get(url)["ETag"]
+        # session, user, project, versions state, but not the versions
+        with self.assertNumQueries(4):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(
+            reverse("changelogs:project_versions_page", args=(self.project.id,)),
+            {"before": "abc"},
+        )
+        self.assertEqual(response.status_code, 400)
+
+
 class ApiDocumentationViewTests(TestCase):
     def test_successful(self):
         response = self.client.get(reverse("changelogs:api_documentation"))
@@ -326,6 +752,24 @@ class AddVersionViewTests(TestCase):
         response = self.client.get(reverse("changelogs:add_version", args=(1000,),))
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+    def test_post_existing_title(self):
+        self.client.login(username="jacob", password="top_secret")
+        project_django = Project.objects.create(
+            title="Django", url="https://github.com/django/django", owner=self.user
+        )
+        Version.objects.create(
+            title="1.0.0",
+            date_time=datetime.datetime.now(tz=pytz.utc),
+            project=project_django,
+            body="* change one",
+        )
+        response = self.client.post(
+            reverse("changelogs:add_version", args=(project_django.id,)),
+            {"title": "1.0.0", "body": "* change two"},
+        )
+        self.assertContains(response, "Version with this title already exists.")
+        self.assertEqual(project_django.versions.count(), 1)
+
 
 class ProjectModelTests(TestCase):
     def setUp(self):
@@ -442,6 +886,90 @@ class VersionModelTests(TestCase):
         )
         self.assertEqual(str(version_sentry_1), "1.0.0 (Sentry)")
 
+    def test_rendered_body(self):
+        project = Project.objects.create(
+            title="Sentry", url="https://github.com/getsentry/sentry", owner=self.user
+        )
+        version = Version.objects.create(
+            title="1.0.0",
+            date_time=datetime.datetime.now(tz=pytz.utc),
+            project=project,
+            body="![image](/logo.png)",
+        )
+        version.refresh_from_db()
+        self.assertEqual(version.renderer_version, MARKDOWN_RENDERER_VERSION)
+        self.assertIn("https://github.com/getsentry/sentry/logo.png", version.body_html)
+
+        version.body = "**fixed**"
+        version.save(update_fields=["body"])
+        version.refresh_from_db()
+        self.assertEqual(version.rendered_body, "<p><strong>fixed</strong></p>")
+
+    def test_project_url_change_marks_versions_stale(self):
+        project = Project.objects.create(
+            title="Sentry", url="https://github.com/getsentry/sentry", owner=self.user
+        )
+        Version.objects.create(
+            title="1.0.0",
+            date_time=datetime.datetime.now(tz=pytz.utc),
+            project=project,
+            body="![image](/logo.png)",
+        )
+        project.url = "https://github.com/getsentry/sentry-python"
+        project.save()
+        version = Version.objects.get()
+        self.assertEqual(version.renderer_version, 0)
+        self.assertIn("sentry-python/logo.png", version.body_html)
+
+        out = StringIO()
+        call_command("render_versions", "--workers=1", "--chunk-size=1", stdout=out)
+        version.refresh_from_db()
+        self.assertEqual(version.renderer_version, MARKDOWN_RENDERER_VERSION)
+        self.assertIn("sentry-python/logo.png", version.rendered_body)
+        self.assertIn("Successfully rendered 1 versions", out.getvalue())
+
+
+class VersionMigrationsTests(TransactionTestCase):
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([("changelogs", target)])
+        return executor.loader.project_state(("changelogs", target)).apps
+
+    def tearDown(self):
+        call_command("migrate", "changelogs", verbosity=0)
+
+    def test_delete_duplicated_versions(self):
+        apps = self.migrate("0005_auto_20200421_0748")
+        User = apps.get_model("changelogs", "User")
+        Project = apps.get_model("changelogs", "Project")
+        Version = apps.get_model("changelogs", "Version")
+        project = Project.objects.create(
+            title="django",
+            url="https://github.com/django/django",
+            owner=User.objects.create(username="jack"),
+        )
+        first = Version.objects.create(
+            title="v1",
+            date_time=timezone.datetime(2020, 1, 1, tzinfo=pytz.utc),
+            body="first",
+            project=project,
+        )
+        Version.objects.create(
+            title="v1",
+            date_time=timezone.datetime(2020, 1, 2, tzinfo=pytz.utc),
+            body="second",
+            project=project,
+        )
+
+        with self.assertLogs(
+            "changelogs.migrations.0006_version_project_title_unique"
+        ) as logs:
+            apps = self.migrate("0006_version_project_title_unique")
+        Version = apps.get_model("changelogs", "Version")
+        self.assertEqual(list(Version.objects.values_list("id", flat=True)), [first.id])
+        self.assertIn("Deleted 1 duplicated versions", logs.output[0])
+
 
 class RestApiTests(APITestCase):
     def setUp(self):
@@ -597,3 +1125,1546 @@ class ValidatorsTests(SimpleTestCase):
             error_context.exception.message,
             "Projects's URL has slash at the end, it's not required",
         )
+
+
+class FetchCommandTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="jacob", email="jacob@mail.com", password="top_secret"
+        )
+        for name in ("django", "flask", "requests"):
+            Project.objects.create(
+                title=name, url=f"https://github.com/me/{name}", owner=self.user
+            )
+        Project.objects.create(
+            title="gitlab", url="https://gitlab.com/gitlab-org/gitlab", owner=self.user
+        )
+
+    @staticmethod
+    def _fetch_projects(projects):
+        return {project: [] for project in projects}
+
+    def _fetch_github_projects(self, projects, batch_size):
+        return self._fetch_projects(projects)
+
+    @mock.patch("changelogs.fetcher.fetch_gitlab_projects")
+    @mock.patch("changelogs.fetcher.fetch_github_projects")
+    def test_fetch_all_projects(self, fetch_github_projects, fetch_gitlab_projects):
+        fetch_github_projects.side_effect = self._fetch_github_projects
+        fetch_gitlab_projects.side_effect = self._fetch_projects
+        out = StringIO()
+        call_command("fetch", "--workers=2", "--github-batch-size=2", stdout=out)
+        self.assertEqual(
+            [len(call[0][0]) for call in fetch_github_projects.call_args_list], [2, 1]
+        )
+        self.assertEqual(fetch_gitlab_projects.call_count, 1)
+        self.assertIn("Successfully fetched changelogs: 4 projects in", out.getvalue())
+        self.assertIn("projects/s", out.getvalue())
+
+    @mock.patch("changelogs.fetcher.fetch_gitlab_projects")
+    @mock.patch("changelogs.fetcher.fetch_github_projects")
+    def test_failed_project_does_not_stop_run(
+        self, fetch_github_projects, fetch_gitlab_projects
+    ):
+        def fetch_github_projects_with_error(projects, batch_size):
+            results = self._fetch_github_projects(projects, batch_size)
+            results[projects[1]] = Exception("Could not resolve to a Repository")
+            return results
+
+        fetch_github_projects.side_effect = fetch_github_projects_with_error
+        fetch_gitlab_projects.side_effect = Exception("Bad credentials")
+        out, err = StringIO(), StringIO()
+        call_command("fetch", stdout=out, stderr=err)
+        self.assertIn("Could not resolve to a Repository", err.getvalue())
+        self.assertIn("Bad credentials", err.getvalue())
+        self.assertIn("with 2 errors: 4 projects", out.getvalue())
+
+    @mock.patch("changelogs.fetcher.fetch_github_projects")
+    def test_host_concurrency_limit(self, fetch_github_projects):
+        lock = threading.Lock()
+        in_flight = []
+        peak = []
+
+        def fetch(projects, batch_size):
+            with lock:
+                in_flight.append(projects)
+                peak.append(len(in_flight))
+            time.sleep(0.01)
+            with lock:
+                in_flight.remove(projects)
+            return self._fetch_github_projects(projects, batch_size)
+
+        fetch_github_projects.side_effect = fetch
+        fetcher = ProjectFetcher(
+            workers=8, host_concurrency={"github.com": 2}, github_batch_size=1
+        )
+        result = fetcher.fetch(Project.objects.filter(url__contains="github.com"))
+        self.assertEqual(result.fetched, 3)
+        self.assertLessEqual(max(peak), 2)
+
+    @mock.patch("changelogs.fetcher.fetch_gitlab_projects")
+    @mock.patch("changelogs.fetcher.fetch_github_projects")
+    def test_slow_host_does_not_hold_workers(
+        self, fetch_github_projects, fetch_gitlab_projects
+    ):
+        Project.objects.filter(title="gitlab").update(gitlab_project_id=1)
+        for project_id in (2, 3):
+            Project.objects.create(
+                title=f"gitlab-{project_id}",
+                url=f"https://gitlab.com/gitlab-org/gitlab-{project_id}",
+                owner=self.user,
+                gitlab_project_id=project_id,
+            )
+        lock = threading.Lock()
+        gitlab_fetched = []
+        gitlab_done = threading.Event()
+        waited = []
+        in_flight = []
+        peak = []
+
+        def fetch_github(projects, batch_size):
+            with lock:
+                in_flight.append(projects)
+                peak.append(len(in_flight))
+            # the slow host only goes on once the other host is done
+            waited.append(gitlab_done.wait(5))
+            with lock:
+                in_flight.remove(projects)
+            return self._fetch_github_projects(projects, batch_size)
+
+        def fetch_gitlab(projects):
+            with lock:
+                in_flight.append(projects)
+                peak.append(len(in_flight))
+            time.sleep(0.01)
+            with lock:
+                in_flight.remove(projects)
+                gitlab_fetched.extend(projects)
+                if len(gitlab_fetched) == 3:
+                    gitlab_done.set()
+            return self._fetch_projects(projects)
+
+        fetch_github_projects.side_effect = fetch_github
+        fetch_gitlab_projects.side_effect = fetch_gitlab
+        fetcher = ProjectFetcher(
+            workers=2, host_concurrency={"github.com": 1}, github_batch_size=1
+        )
+        result = fetcher.fetch(Project.objects.order_by("id"))
+        self.assertEqual(result.fetched, 6)
+        self.assertEqual(waited, [True, True, True])
+        self.assertLessEqual(max(peak), 2)
+
+
+class IngestVersionsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="jacob", email="jacob@mail.com", password="top_secret"
+        )
+        self.project = Project.objects.create(
+            title="django", url="https://github.com/django/django", owner=self.user
+        )
+        Version.objects.create(
+            title="1.0.0",
+            date_time=datetime.datetime(2020, 1, 1, tzinfo=pytz.utc),
+            project=self.project,
+            body="first release",
+        )
+        self.created = []
+        post_save.connect(self._on_version_saved, sender=Version)
+        self.addCleanup(post_save.disconnect, self._on_version_saved, sender=Version)
+
+    def _on_version_saved(self, sender, instance, created, **kwargs):
+        if created:
+            self.created.append(instance.title)
+
+    def _version(self, title):
+        return Version(
+            title=title,
+            date_time=datetime.datetime(2020, 2, 1, tzinfo=pytz.utc),
+            project=self.project,
+            body=f"{title} release",
+        )
+
+    def test_only_new_versions_are_inserted(self):
+        with self.assertNumQueries(5):
+            created = ingest_versions(
+                self.project,
+                [
+                    self._version("1.0.0"),
+                    self._version("1.1.0"),
+                    self._version("1.2.0"),
+                ],
+            )
+        self.assertEqual(sorted(v.title for v in created), ["1.1.0", "1.2.0"])
+        self.assertEqual(sorted(self.created), ["1.1.0", "1.2.0"])
+        self.assertEqual(self.project.versions.count(), 3)
+
+    @override_settings(
+        NOTIFICATION_CHANNELS={
+            "email": {"BACKEND": "changelogs.channels.InMemoryChannel"}
+        }
+    )
+    def test_notifications_enqueued_at_once(self):
+        self.project.subscribers.add(self.user)
+        versions = [self._version(f"2.{i}.0") for i in range(10)]
+        # the same queries as for one version
+        with self.assertNumQueries(9):
+            created = ingest_versions(self.project, versions)
+        self.assertEqual(len(created), 10)
+        self.assertEqual(
+            NotificationJob.objects.filter(user=self.user, channel="email").count(), 10,
+        )
+
+    def test_nothing_new(self):
+        with self.assertNumQueries(1):
+            created = ingest_versions(self.project, [self._version("1.0.0")])
+        self.assertEqual(created, [])
+        self.assertEqual(self.created, [])
+
+    def test_duplicated_releases_in_one_batch(self):
+        created = ingest_versions(
+            self.project, [self._version("2.0.0"), self._version("2.0.0")]
+        )
+        self.assertEqual(len(created), 1)
+        self.assertEqual(self.created, ["2.0.0"])
+
+    def test_concurrently_inserted_version(self):
+        self._version("3.0.0").save()
+        self.created.clear()
+        with mock.patch(
+            "changelogs.services.existing_version_titles",
+            side_effect=[{"1.0.0"}, {"1.0.0", "3.0.0"}],
+        ):
+            created = ingest_versions(
+                self.project, [self._version("3.0.0"), self._version("3.1.0")]
+            )
+        self.assertEqual([v.title for v in created], ["3.1.0"])
+        self.assertEqual(self.created, ["3.1.0"])
+        self.assertEqual(self.project.versions.filter(title="3.0.0").count(), 1)
+
+
+def _github_releases_page(
+    tags, end_cursor=None, has_next_page=False, alias="r0", drafts=()
+):
+    return {
+        "data": {
+            alias: {
+                "releases": {
+                    "edges": [
+                        {
+                            "cursor": f"cursor-{tag}",
+                            "node": {
+                                "tagName": tag,
+                                "createdAt": timezone.now().isoformat(),
+                                "publishedAt": None
+                                if tag in drafts
+                                else "2019-12-02T10:00:00Z",
+                                "description": f"* {tag} release",
+                            },
+                        }
+                        for tag in tags
+                    ],
+                    "pageInfo": {
+                        "hasNextPage": has_next_page,
+                        "endCursor": end_cursor,
+                    },
+                }
+            }
+        }
+    }
+
+
+def _gitlab_releases_response(releases, status_code=200, headers=None):
+    response = mock.Mock(status_code=status_code, headers=headers or {})
+    response.content = json.dumps(
+        [
+            {
+                "name": name,
+                "released_at": released_at,
+                "description": f"* {name} release",
+            }
+            for name, released_at in releases
+        ]
+    ).encode("utf8")
+    return response
+
+
+class FetchProjectTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="jacob", email="jacob@mail.com", password="top_secret"
+        )
+
+    @mock.patch("changelogs.services._run_graphql_query")
+    def test_fetch_github_project(self, run_graphql_query):
+        project = Project.objects.create(
+            title="django", url="https://github.com/django/django", owner=self.user
+        )
+        run_graphql_query.return_value = _github_releases_page(["3.0.0"], "c1")
+        self.assertEqual(len(fetch_github_project(project)), 1)
+        self.assertIn("last: 25", run_graphql_query.call_args[0][0])
+        version = project.versions.get()
+        self.assertEqual(version.title, "3.0.0")
+        self.assertEqual(version.body, "* 3.0.0 release")
+        self.assertEqual(
+            version.date_time, datetime.datetime(2019, 12, 2, 10, tzinfo=pytz.utc)
+        )
+        project.refresh_from_db()
+        self.assertEqual(project.releases_cursor, "c1")
+        self.assertEqual(project.last_released_at, version.date_time)
+
+    @mock.patch("changelogs.services._run_graphql_query")
+    def test_fetch_github_project_with_draft(self, run_graphql_query):
+        project = Project.objects.create(
+            title="django",
+            url="https://github.com/django/django",
+            owner=self.user,
+            releases_cursor="c1",
+        )
+        run_graphql_query.return_value = _github_releases_page(
+            ["3.0", "3.1", "3.2"], "c2", drafts=["3.1"]
+        )
+        self.assertEqual(len(fetch_github_project(project)), 2)
+        project.refresh_from_db()
+        # the draft is fetched again until it is published
+        self.assertEqual(project.releases_cursor, "cursor-3.0")
+
+        run_graphql_query.return_value = _github_releases_page(["3.1", "3.2"], "c2")
+        self.assertEqual(
+            [version.title for version in fetch_github_project(project)], ["3.1"]
+        )
+        self.assertIn('after: "cursor-3.0"', run_graphql_query.call_args[0][0])
+        project.refresh_from_db()
+        self.assertEqual(project.releases_cursor, "c2")
+
+        # abandoned drafts don't hold the cursor back
+        page = _github_releases_page(["3.3"], "c3", drafts=["3.3"])
+        page["data"]["r0"]["releases"]["edges"][0]["node"][
+            "createdAt"
+        ] = "2019-01-01T00:00:00Z"
+        run_graphql_query.return_value = page
+        self.assertEqual(fetch_github_project(project), [])
+        project.refresh_from_db()
+        self.assertEqual(project.releases_cursor, "c3")
+
+    @mock.patch("changelogs.services._run_graphql_query")
+    def test_fetch_github_project_incrementally(self, run_graphql_query):
+        project = Project.objects.create(
+            title="django",
+            url="https://github.com/django/django",
+            owner=self.user,
+            releases_cursor="c1",
+        )
+        run_graphql_query.side_effect = [
+            _github_releases_page([f"3.0.{i}" for i in range(25)], "c2", True),
+            _github_releases_page([f"3.1.{i}" for i in range(25)], "c3", True),
+            _github_releases_page([], None),
+        ]
+        self.assertEqual(len(fetch_github_project(project)), 50)
+        queries = [call[0][0] for call in run_graphql_query.call_args_list]
+        self.assertIn('first: 25, after: "c1"', queries[0])
+        self.assertIn('first: 25, after: "c2"', queries[1])
+        self.assertIn('first: 25, after: "c3"', queries[2])
+        project.refresh_from_db()
+        self.assertEqual(project.releases_cursor, "c3")
+
+        run_graphql_query.reset_mock(side_effect=True)
+        run_graphql_query.return_value = _github_releases_page([], None)
+        self.assertEqual(fetch_github_project(project), [])
+        self.assertEqual(run_graphql_query.call_count, 1)
+
+    @mock.patch("changelogs.services.client.get")
+    def test_fetch_gitlab_project(self, get):
+        project = Project.objects.create(
+            title="gitlab",
+            url="https://gitlab.com/gitlab-org/gitlab",
+            owner=self.user,
+            gitlab_project_id=278964,
+        )
+        get.return_value = _gitlab_releases_response(
+            [("12.10.0", "2020-04-22T00:00:00Z")]
+        )
+        self.assertEqual(len(fetch_gitlab_project(project)), 1)
+        self.assertEqual(
+            get.call_args[0][0], "https://gitlab.com/api/v4/projects/278964/releases",
+        )
+        self.assertEqual(fetch_gitlab_project(project), [])
+        self.assertEqual(project.versions.get().title, "12.10.0")
+        project.refresh_from_db()
+        self.assertEqual(
+            project.last_released_at, datetime.datetime(2020, 4, 22, tzinfo=pytz.utc)
+        )
+
+    @mock.patch("changelogs.services.client.get")
+    @mock.patch("changelogs.services._run_graphql_query")
+    def test_release_without_notes(self, run_graphql_query, get):
+        github_project = Project.objects.create(
+            title="django", url="https://github.com/django/django", owner=self.user
+        )
+        page = _github_releases_page(["3.0.0"], "c1")
+        page["data"]["r0"]["releases"]["edges"][0]["node"]["description"] = None
+        run_graphql_query.return_value = page
+        self.assertEqual(len(fetch_github_project(github_project)), 1)
+
+        gitlab_project = Project.objects.create(
+            title="gitlab",
+            url="https://gitlab.com/gitlab-org/gitlab",
+            owner=self.user,
+            gitlab_project_id=278964,
+        )
+        response = _gitlab_releases_response([("12.10.0", "2020-04-22T00:00:00Z")])
+        release = json.loads(response.content)[0]
+        response.content = json.dumps([dict(release, description=None)]).encode()
+        get.return_value = response
+        self.assertEqual(len(fetch_gitlab_project(gitlab_project)), 1)
+        self.assertEqual(list(Version.objects.values_list("body", flat=True)), ["", ""])
+
+    @mock.patch("changelogs.services.client.get")
+    def test_fetch_gitlab_project_incrementally(self, get):
+        project = Project.objects.create(
+            title="gitlab",
+            url="https://gitlab.com/gitlab-org/gitlab",
+            owner=self.user,
+            gitlab_project_id=278964,
+            last_released_at=datetime.datetime(2020, 1, 1, tzinfo=pytz.utc),
+        )
+        get.side_effect = [
+            _gitlab_releases_response(
+                [(f"13.{i}", "2020-04-22T00:00:00Z") for i in range(25)]
+            ),
+            _gitlab_releases_response(
+                [("12.1", "2020-02-01T00:00:00Z"), ("12.0", "2020-01-01T00:00:00Z")]
+                + [(f"11.{i}", "2019-12-01T00:00:00Z") for i in range(23)]
+            ),
+        ]
+        self.assertEqual(len(fetch_gitlab_project(project)), 50)
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(get.call_args[1]["params"]["page"], 2)
+
+
+class FetchGithubProjectsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="jacob",
+            email="jacob@mail.com",
+            password="top_secret",
+            github_token="token",
+        )
+        self.projects = [
+            Project.objects.create(
+                title=name, url=f"https://github.com/me/{name}", owner=self.user
+            )
+            for name in ("django", "deleted", "flask")
+        ]
+
+    @mock.patch("changelogs.services._run_graphql_query")
+    def test_batched_query(self, run_graphql_query):
+        run_graphql_query.return_value = {
+            "data": {
+                **_github_releases_page(["1.0"], "c1", alias="r0")["data"],
+                "r1": None,
+                **_github_releases_page(["2.0"], "c2", alias="r2")["data"],
+            },
+            "errors": [
+                {
+                    "type": "NOT_FOUND",
+                    "path": ["r1"],
+                    "message": "Could not resolve to a Repository",
+                }
+            ],
+        }
+        results = fetch_github_projects(self.projects)
+
+        self.assertEqual(run_graphql_query.call_count, 1)
+        query, url, token = run_graphql_query.call_args[0]
+        self.assertIn('r0: repository(owner: "me", name: "django")', query)
+        self.assertIn('r2: repository(owner: "me", name: "flask")', query)
+        self.assertEqual(token, "token")
+        self.assertEqual([v.title for v in results[self.projects[0]]], ["1.0"])
+        self.assertEqual(
+            str(results[self.projects[1]]), "Could not resolve to a Repository"
+        )
+        self.assertEqual([v.title for v in results[self.projects[2]]], ["2.0"])
+
+    @mock.patch("changelogs.services._run_graphql_query")
+    def test_batch_size(self, run_graphql_query):
+        run_graphql_query.side_effect = [
+            {
+                "data": {
+                    **_github_releases_page([], alias="r0")["data"],
+                    **_github_releases_page([], alias="r1")["data"],
+                }
+            },
+            _github_releases_page([]),
+        ]
+        results = fetch_github_projects(self.projects, batch_size=2)
+        self.assertEqual(run_graphql_query.call_count, 2)
+        self.assertEqual(list(results.values()), [[], [], []])
+
+    @mock.patch("changelogs.services._run_graphql_query")
+    def test_failed_batch(self, run_graphql_query):
+        run_graphql_query.side_effect = Exception("Query failed to run")
+        results = fetch_github_projects(self.projects)
+        self.assertEqual(len(results), 3)
+        for result in results.values():
+            self.assertEqual(str(result), "Query failed to run")
+
+
+class FetchGitlabProjectsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="jacob",
+            email="jacob@mail.com",
+            password="top_secret",
+            gitlab_token="token",
+        )
+        self.projects = [
+            Project.objects.create(
+                title=name, url=f"https://gitlab.com/me/{name}", owner=self.user
+            )
+            for name in ("gitlab", "deleted")
+        ]
+
+    @mock.patch("changelogs.services.client.get")
+    @mock.patch("changelogs.services._run_graphql_query")
+    def test_project_ids_are_resolved_once(self, run_graphql_query, get):
+        run_graphql_query.return_value = {
+            "data": {"p0": {"id": "gid://gitlab/Project/278964"}, "p1": None}
+        }
+        get.return_value = _gitlab_releases_response([])
+
+        results = fetch_gitlab_projects(self.projects)
+
+        query, url, token = run_graphql_query.call_args[0]
+        self.assertIn('p0: project(fullPath: "me/gitlab")', query)
+        self.assertIn('p1: project(fullPath: "me/deleted")', query)
+        self.assertEqual(url, "https://gitlab.com/api/graphql")
+        self.assertEqual(results[self.projects[0]], [])
+        self.assertIsInstance(results[self.projects[1]], Exception)
+        self.assertEqual(get.call_count, 1)
+
+        project = Project.objects.get(pk=self.projects[0].pk)
+        self.assertEqual(project.gitlab_project_id, 278964)
+        run_graphql_query.reset_mock()
+        self.assertEqual(fetch_gitlab_project(project), [])
+        run_graphql_query.assert_not_called()
+        self.assertEqual(get.call_count, 2)
+
+    @mock.patch("changelogs.services.client.get")
+    def test_conditional_request(self, get):
+        project = self.projects[0]
+        Project.objects.filter(pk=project.pk).update(gitlab_project_id=278964)
+        project.refresh_from_db()
+        get.return_value = _gitlab_releases_response(
+            [("12.10.0", "2020-04-22T00:00:00Z")],
+            headers={
+                "ETag": 'W/"abc"',
+                "Last-Modified": "Wed, 22 Apr 2020 00:00:00 GMT",
+            },
+        )
+        self.assertEqual(len(fetch_gitlab_project(project)), 1)
+        self.assertNotIn("If-None-Match", get.call_args[1]["headers"])
+
+        get.return_value = _gitlab_releases_response([], status_code=304)
+        with self.assertNumQueries(2):
+            self.assertEqual(fetch_gitlab_project(project), [])
+        headers = get.call_args[1]["headers"]
+        self.assertEqual(headers["If-None-Match"], 'W/"abc"')
+        self.assertEqual(headers["If-Modified-Since"], "Wed, 22 Apr 2020 00:00:00 GMT")
+
+    def test_changed_url_resets_fetch_state(self):
+        project = self.projects[0]
+        Project.objects.filter(pk=project.pk).update(
+            gitlab_project_id=278964, releases_cursor="c1"
+        )
+        project.refresh_from_db()
+        project.title = "GitLab"
+        project.save()
+        self.assertEqual(project.gitlab_project_id, 278964)
+        project.url = "https://gitlab.com/gitlab-org/gitlab"
+        project.save()
+        project.refresh_from_db()
+        self.assertIsNone(project.gitlab_project_id)
+        self.assertEqual(project.releases_cursor, "")
+
+
+@mock.patch("changelogs.http_client.time.sleep")
+class HttpClientTests(SimpleTestCase):
+    def setUp(self):
+        self.client = HttpClient()
+        self.finished = []
+        upstream_request_finished.connect(self._on_request_finished)
+        self.addCleanup(upstream_request_finished.disconnect, self._on_request_finished)
+
+    def _on_request_finished(self, sender, **kwargs):
+        self.finished.append(kwargs)
+
+    def test_timeouts(self, sleep):
+        with mock.patch.object(
+            self.client.session, "request", return_value=mock.Mock(status_code=200)
+        ) as request:
+            self.client.get("https://gitlab.com/api/v4/projects/1/releases")
+        self.assertEqual(request.call_args[1]["timeout"], (5, 30))
+        self.assertEqual(len(self.finished), 1)
+        self.assertEqual(self.finished[0]["response"].status_code, 200)
+        self.assertGreaterEqual(self.finished[0]["elapsed"], 0)
+
+    def test_retries(self, sleep):
+        responses = [
+            mock.Mock(status_code=502, headers={}),
+            requests.ConnectionError("Connection reset by peer"),
+            mock.Mock(status_code=503, headers={"Retry-After": "4"}),
+            mock.Mock(status_code=200, headers={}),
+        ]
+        with mock.patch.object(self.client.session, "request", side_effect=responses):
+            response = self.client.post("https://api.github.com/graphql")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sleep.call_count, 3)
+        self.assertGreaterEqual(sleep.call_args_list[2][0][0], 2)
+        self.assertEqual(len(self.finished), 4)
+        self.assertIsInstance(self.finished[1]["exception"], requests.ConnectionError)
+
+    def test_rate_limited(self, sleep):
+        for status_code, headers in (
+            (429, {"Retry-After": "4"}),
+            (403, {"X-RateLimit-Remaining": "0"}),
+        ):
+            with mock.patch.object(
+                self.client.session,
+                "request",
+                return_value=mock.Mock(status_code=status_code, headers=headers),
+            ) as request:
+                response = self.client.post("https://api.github.com/graphql")
+            self.assertEqual(response.status_code, status_code)
+            self.assertEqual(request.call_count, 1)
+        sleep.assert_not_called()
+
+    @override_settings(HTTP_RETRIES=1)
+    def test_retries_exhausted(self, sleep):
+        with mock.patch.object(
+            self.client.session,
+            "request",
+            return_value=mock.Mock(status_code=503, headers={}),
+        ) as request:
+            response = self.client.get("https://gitlab.com")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(request.call_count, 2)
+
+        with mock.patch.object(
+            self.client.session, "request", side_effect=requests.Timeout()
+        ):
+            with self.assertRaises(requests.Timeout):
+                self.client.get("https://gitlab.com")
+
+    def test_without_retries(self, sleep):
+        with mock.patch.object(
+            self.client.session, "request", side_effect=requests.ReadTimeout()
+        ) as request:
+            with self.assertRaises(requests.ReadTimeout):
+                self.client.post("https://example.com/hook", retries=0)
+        self.assertEqual(request.call_count, 1)
+        sleep.assert_not_called()
+
+
+class RateLimitsTests(TestCase):
+    def setUp(self):
+        rate_limits.clear()
+        self.addCleanup(rate_limits.clear)
+        self.user = User.objects.create_user(
+            username="jacob",
+            email="jacob@mail.com",
+            password="top_secret",
+            github_token="token",
+        )
+        for name in ("django", "flask", "requests"):
+            Project.objects.create(
+                title=name, url=f"https://github.com/me/{name}", owner=self.user
+            )
+
+    def test_tracked_from_headers(self):
+        reset = time.time() + 60
+        client = HttpClient()
+        with mock.patch.object(
+            client.session,
+            "request",
+            return_value=mock.Mock(
+                status_code=200,
+                headers={
+                    "X-RateLimit-Remaining": "10",
+                    "X-RateLimit-Reset": str(reset),
+                },
+            ),
+        ):
+            client.post(
+                "https://api.github.com/graphql",
+                headers={"Authorization": "Bearer token"},
+            )
+        self.assertEqual(rate_limits.reset_at(("api.github.com", "token")), reset)
+
+        rate_limits.update_from_headers(
+            ("gitlab.com", "token"),
+            {"RateLimit-Remaining": "1000", "RateLimit-Reset": str(reset)},
+        )
+        self.assertIsNone(rate_limits.reset_at(("gitlab.com", "token")))
+
+    def test_tracked_from_graphql(self):
+        key = ("api.github.com", "token")
+        rate_limits.update_from_graphql(
+            key, {"remaining": 0, "resetAt": "2100-01-01T00:00:00Z", "cost": 1}
+        )
+        self.assertEqual(
+            rate_limits.reset_at(key),
+            datetime.datetime(2100, 1, 1, tzinfo=pytz.utc).timestamp(),
+        )
+        rate_limits.update_from_graphql(
+            key, {"remaining": 0, "resetAt": "2000-01-01T00:00:00Z", "cost": 1}
+        )
+        self.assertIsNone(rate_limits.reset_at(key))
+
+    @mock.patch("changelogs.fetcher.time.sleep")
+    @mock.patch("changelogs.fetcher.fetch_github_projects")
+    def test_exhausted_projects_resume_after_reset(self, fetch_github_projects, sleep):
+        reset_at = time.time() + 60
+        fetch_github_projects.side_effect = [
+            {
+                project: RateLimitExceeded("Rate limit exceeded", reset_at)
+                for project in Project.objects.all()
+            },
+            {project: [] for project in Project.objects.all()},
+        ]
+        result = ProjectFetcher().fetch(Project.objects.all())
+        self.assertEqual(result.fetched, 3)
+        self.assertEqual(result.errors, [])
+        self.assertEqual(fetch_github_projects.call_count, 2)
+        self.assertAlmostEqual(sleep.call_args_list[0][0][0], 60, delta=5)
+
+    @mock.patch("changelogs.fetcher.fetch_github_projects")
+    def test_exhausted_token_is_not_used(self, fetch_github_projects):
+        rate_limits.update(("api.github.com", "token"), 0, time.time() + 3600)
+        out = StringIO()
+        call_command("fetch", stdout=out)
+        fetch_github_projects.assert_not_called()
+        self.assertIn(
+            "3 projects are deferred until their rate limits reset", out.getvalue()
+        )
+
+
+@mock.patch("changelogs.services._run_graphql_query")
+class FetchScheduleTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="jacob", email="jacob@mail.com", password="top_secret"
+        )
+        self.project = Project.objects.create(
+            title="django", url="https://github.com/django/django", owner=self.user
+        )
+        for day in (1, 3, 5, 7):
+            Version.objects.create(
+                title=f"1.{day}",
+                date_time=datetime.datetime(2020, 1, day, tzinfo=pytz.utc),
+                project=self.project,
+                body="* changes",
+            )
+
+    def test_interval_follows_release_cadence(self, run_graphql_query):
+        run_graphql_query.return_value = _github_releases_page(["2.0"], "c1")
+        fetch_github_project(self.project)
+        self.project.refresh_from_db()
+        # releases every two days are polled every 12 hours
+        self.assertEqual(self.project.fetch_interval, datetime.timedelta(hours=12))
+        self.assertEqual(self.project.unchanged_fetch_count, 0)
+        self.assertAlmostEqual(
+            self.project.next_fetch_at,
+            timezone.now() + datetime.timedelta(hours=12),
+            delta=datetime.timedelta(minutes=1),
+        )
+
+    def test_interval_grows_without_changes(self, run_graphql_query):
+        run_graphql_query.return_value = _github_releases_page([])
+        fetch_github_project(self.project)
+        fetch_github_project(self.project)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.unchanged_fetch_count, 2)
+        self.assertAlmostEqual(
+            self.project.next_fetch_at,
+            timezone.now() + datetime.timedelta(hours=48),
+            delta=datetime.timedelta(minutes=1),
+        )
+
+    def test_only_due_projects_are_fetched(self, run_graphql_query):
+        Project.objects.create(
+            title="flask",
+            url="https://github.com/pallets/flask",
+            owner=self.user,
+            next_fetch_at=timezone.now() + datetime.timedelta(hours=1),
+        )
+        Project.objects.create(
+            title="requests",
+            url="https://github.com/psf/requests",
+            owner=self.user,
+            next_fetch_at=timezone.now() - datetime.timedelta(hours=1),
+        )
+        self.assertEqual(
+            list(Project.objects.due_for_fetch().values_list("title", flat=True)),
+            ["django", "requests"],
+        )
+
+
+@override_settings(GITHUB_WEBHOOK_SECRET="secret", GITLAB_WEBHOOK_TOKEN="token")
+class WebhookViewsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="jacob", email="jacob@mail.com", password="top_secret"
+        )
+        self.github_project = Project.objects.create(
+            title="django", url="https://github.com/django/django", owner=self.user
+        )
+        self.gitlab_project = Project.objects.create(
+            title="gitlab", url="https://gitlab.com/gitlab-org/gitlab", owner=self.user
+        )
+
+    def _post_github(self, payload, event="release", secret="secret"):
+        body = json.dumps(payload).encode()
+        signature = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        return self.client.post(
+            reverse("changelogs:github_webhook"),
+            body,
+            content_type="application/json",
+            HTTP_X_GITHUB_EVENT=event,
+            HTTP_X_HUB_SIGNATURE_256=f"sha256={signature}",
+        )
+
+    def _post_gitlab(self, payload, token="token"):
+        return self.client.post(
+            reverse("changelogs:gitlab_webhook"),
+            json.dumps(payload),
+            content_type="application/json",
+            HTTP_X_GITLAB_EVENT="Release Hook",
+            HTTP_X_GITLAB_TOKEN=token,
+        )
+
+    def test_github_release(self):
+        payload = {
+            "action": "published",
+            "release": {
+                "tag_name": "3.0.5",
+                "published_at": "2020-04-01T08:00:00Z",
+                "body": "* security fixes",
+            },
+            "repository": {"html_url": "https://github.com/Django/django"},
+        }
+        response = self._post_github(payload)
+        self.assertEqual(response.json(), {"created": 1})
+        version = self.github_project.versions.get()
+        self.assertEqual(version.title, "3.0.5")
+        self.assertEqual(version.body, "* security fixes")
+
+        response = self._post_github(payload)
+        self.assertEqual(response.json(), {"created": 0})
+
+    def test_github_wrong_signature(self):
+        response = self._post_github({"action": "published"}, secret="wrong")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_github_ping(self):
+        response = self._post_github({"zen": "Keep it simple."}, event="ping")
+        self.assertEqual(response.json(), {"created": 0})
+
+    def test_gitlab_release(self):
+        response = self._post_gitlab(
+            {
+                "object_kind": "release",
+                "action": "create",
+                "name": "12.10.0",
+                "tag": "v12.10.0",
+                "description": "* new release",
+                "released_at": "2020-04-22 00:00:00 UTC",
+                "project": {"web_url": "https://gitlab.com/gitlab-org/gitlab"},
+            }
+        )
+        self.assertEqual(response.json(), {"created": 1})
+        version = self.gitlab_project.versions.get()
+        self.assertEqual(version.title, "12.10.0")
+        self.assertEqual(
+            version.date_time, datetime.datetime(2020, 4, 22, tzinfo=pytz.utc)
+        )
+
+    def test_gitlab_wrong_token(self):
+        response = self._post_gitlab({"action": "create"}, token="wrong")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class FetchInstrumentationTests(TestCase):
+    def setUp(self):
+        rate_limits.clear()
+        self.addCleanup(rate_limits.clear)
+        self.user = User.objects.create_user(
+            username="jacob",
+            email="jacob@mail.com",
+            password="top_secret",
+            github_token="token",
+        )
+        for name in ("django", "flask"):
+            Project.objects.create(
+                title=name, url=f"https://github.com/me/{name}", owner=self.user
+            )
+
+    @staticmethod
+    def _fetch_github_projects(projects, batch_size):
+        # one request for the whole batch, as a GraphQL query would be
+        response = mock.Mock(
+            status_code=200,
+            content=b"x" * 100,
+            headers={"X-RateLimit-Remaining": "4000"},
+        )
+        upstream_request_finished.send(
+            sender=HttpClient,
+            method="POST",
+            url="https://api.github.com/graphql",
+            request_headers={},
+            response=response,
+            exception=None,
+            elapsed=0.2,
+        )
+        record_releases(projects[0], 3, 1)
+        return {project: [] for project in projects}
+
+    @mock.patch("changelogs.fetcher.fetch_github_projects")
+    def test_run_history(self, fetch_github_projects):
+        fetch_github_projects.side_effect = self._fetch_github_projects
+        out = StringIO()
+        call_command("fetch", "--stats", "--profile", stdout=out)
+
+        run = FetchRun.objects.get()
+        self.assertEqual(run.fetched_count, 2)
+        self.assertEqual(run.errors_count, 0)
+        django = ProjectFetch.objects.get(run=run, project__title="django")
+        self.assertEqual(django.requests, 0.5)
+        self.assertEqual(django.latency, 0.1)
+        self.assertEqual(django.bytes_received, 50)
+        self.assertEqual(django.releases_seen, 3)
+        self.assertEqual(django.releases_inserted, 1)
+        self.assertEqual(django.rate_limit_remaining, 4000)
+        self.assertIn("github.com: 2 projects", out.getvalue())
+        self.assertIn("latency, s: p50=", out.getvalue())
+        self.assertIn("django", out.getvalue())
+
+        call_command("fetch", "--all", "--stats", stdout=out)
+        self.assertEqual(FetchRun.objects.count(), 2)
+        self.assertIn("previous run", out.getvalue())
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([], 90), 0)
+
+
+class VersionCardCacheTests(TestCase):
+    def setUp(self):
+        caches["fragments"].clear()
+        self.addCleanup(caches["fragments"].clear)
+        self.user = User.objects.create_user(
+            username="jacob", email="jacob@mail.com", password="top_secret"
+        )
+        self.project = Project.objects.create(
+            title="django", url="https://github.com/django/django", owner=self.user
+        )
+        self.version = Version.objects.create(
+            title="1.0.0",
+            date_time=datetime.datetime.now(tz=pytz.utc),
+            project=self.project,
+            body="![image](/logo.png)",
+        )
+
+    def test_cached_card(self):
+        html = render_version_card(self.version)
+        with mock.patch("changelogs.fragment_cache.render_to_string") as render:
+            self.assertEqual(render_version_card(self.version), html)
+            render.assert_not_called()
+        self.assertEqual(version_card_stats(), (1, 1))
+
+        out = StringIO()
+        err = StringIO()
+        call_command("fragment_cache_stats", "--reset", stdout=out, stderr=err)
+        self.assertIn("1 hits, 1 misses, hit ratio 50.0%", out.getvalue())
+        self.assertIn("local to every process", err.getvalue())
+        self.assertEqual(version_card_stats(), (0, 0))
+
+    def test_version_change_invalidates_card(self):
+        render_version_card(self.version)
+        self.version.body = "**fixed**"
+        self.version.save()
+        self.assertIn("<strong>fixed</strong>", render_version_card(self.version))
+
+        self.version.delete()
+        self.assertIsNone(caches["fragments"].get(f"version-card:{self.version.id}"))
+
+    def test_project_url_change_invalidates_cards(self):
+        render_version_card(self.version)
+        self.project.url = "https://github.com/django/django-old"
+        self.project.save()
+        version = Version.objects.get()
+        # for the cards cached by other processes
+        self.assertGreater(version.updated_at, self.version.updated_at)
+        self.assertIn("django-old/logo.png", render_version_card(version))
+        self.assertEqual(version_card_stats(), (0, 2))
+
+
+class ProjectExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="jacob", email="jacob@mail.com", password="top_secret"
+        )
+        self.project = Project.objects.create(
+            title="django",
+            url="https://github.com/django/django",
+            owner=self.user,
+            is_public=True,
+        )
+        for i in range(3):
+            Version.objects.create(
+                title=f"1.{i}",
+                date_time=datetime.datetime(2020, 1, 1 + i, tzinfo=pytz.utc),
+                project=self.project,
+                body=f"release 1.{i}",
+            )
+
+    def _url(self, export_format):
+        return reverse(
+            "changelogs:project_export", args=(self.project.id, export_format)
+        )
+
+    def test_export_formats(self):
+        response = self.client.get(self._url("json"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        versions = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([v["title"] for v in versions], ["1.0", "1.1", "1.2"])
+
+        response = self.client.get(self._url("ndjson"), {"since": "2020-01-01T12:00Z"})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)["title"] for line in lines], ["1.1", "1.2"])
+
+        response = self.client.get(self._url("md"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        markdown = gzip.decompress(b"".join(response.streaming_content)).decode()
+        self.assertTrue(markdown.startswith("# django\n"))
+        self.assertIn("## 1.2 (2020-01-03)\n\nrelease 1.2\n", markdown)
+
+    def test_empty_json_export(self):
+        response = self.client.get(self._url("json"), {"since": "2021-01-01T00:00Z"})
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), [])
+
+    def test_errors(self):
+        self.assertEqual(self.client.get(self._url("xml")).status_code, 404)
+        for since in ("yesterday", "2020-02-30T00:00:00"):
+            response = self.client.get(self._url("json"), {"since": since})
+            self.assertEqual(response.status_code, 400)
+
+        self.project.is_public = False
+        self.project.save()
+        self.assertEqual(self.client.get(self._url("json")).status_code, 404)
+        response = self.client.get(
+            self._url("json"), HTTP_AUTHORIZATION=f"Token {self.user.auth_token.key}"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_command(self):
+        out = StringIO()
+        call_command("export_versions", self.project.id, "--format=ndjson", stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "django.json.gz")
+            call_command(
+                "export_versions",
+                self.project.id,
+                "--format=json",
+                "--since=2020-01-02T12:00Z",
+                "--gzip",
+                f"--output={path}",
+            )
+            with gzip.open(path) as f:
+                self.assertEqual([v["title"] for v in json.load(f)], ["1.2"])
+
+        with self.assertRaisesMessage(CommandError, "Invalid date and time"):
+            call_command(
+                "export_versions", self.project.id, "--since=2020-02-30T00:00:00"
+            )
+
+
+@override_settings(
+    NOTIFICATION_CHANNELS={"email": {"BACKEND": "changelogs.channels.SendGridChannel"}},
+    SENDGRID_API_KEY="key",
+)
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(
+            title="django",
+            url="https://github.com/django/django",
+            owner=User.objects.create_user(username="owner", password="top_secret"),
+        )
+        for username in ("jacob", "adrian"):
+            self.project.subscribers.add(
+                User.objects.create_user(
+                    username=username, email=f"{username}@mail.com", password="secret"
+                )
+            )
+        self.project.subscribers.add(
+            User.objects.create_user(username="noemail", password="top_secret")
+        )
+
+    def _create_version(self, title="1.0"):
+        return Version.objects.create(
+            title=title, date_time=timezone.now(), project=self.project, body="release",
+        )
+
+    @mock.patch("changelogs.channels.SendGridAPIClient")
+    def test_enqueue(self, sendgrid_client):
+        version = self._create_version()
+        sendgrid_client.assert_not_called()
+        self.assertEqual(
+            set(
+                NotificationJob.objects.filter(
+                    version=version, status=NotificationJob.PENDING
+                ).values_list("user__username", flat=True)
+            ),
+            {"jacob", "adrian"},
+        )
+
+        with self.assertRaises(ZeroDivisionError):
+            with transaction.atomic():
+                self._create_version("2.0")
+                1 / 0
+        self.assertEqual(NotificationJob.objects.count(), 2)
+
+    @override_settings(NOTIFICATION_RECIPIENTS_PER_MESSAGE=1)
+    @mock.patch("changelogs.channels.SendGridAPIClient")
+    def test_send(self, sendgrid_client):
+        def send(message):
+            if "adrian" in str(message.get()):
+                raise Exception("HTTP Error 503: Service Unavailable")
+
+        sendgrid_client.return_value.send.side_effect = send
+        self._create_version()
+        out = StringIO()
+        call_command("send_notifications", stdout=out)
+        self.assertIn("1 pending, 1 sent", out.getvalue())
+        self.assertEqual(sendgrid_client.return_value.send.call_count, 2)
+
+        sent = NotificationJob.objects.get(user__username="jacob")
+        self.assertEqual(sent.status, NotificationJob.SENT)
+        self.assertIsNotNone(sent.sent_at)
+        retried = NotificationJob.objects.get(user__username="adrian")
+        self.assertEqual(retried.status, NotificationJob.PENDING)
+        self.assertEqual(retried.attempts, 1)
+        self.assertGreater(retried.next_attempt_at, timezone.now())
+        self.assertIn("503", retried.last_error)
+
+        # the retry isn't due yet
+        call_command("send_notifications", stdout=out)
+        self.assertEqual(sendgrid_client.return_value.send.call_count, 2)
+
+    @mock.patch("changelogs.channels.SendGridAPIClient")
+    def test_e_mail_address_removed(self, sendgrid_client):
+        self._create_version()
+        User.objects.filter(username="adrian").update(email="")
+        out = StringIO()
+        call_command("send_notifications", stdout=out)
+        self.assertIn("1 sent, 1 skipped", out.getvalue())
+        message = sendgrid_client.return_value.send.call_args[0][0].get()
+        self.assertEqual(
+            [to["email"] for p in message["personalizations"] for to in p["to"]],
+            ["jacob@mail.com"],
+        )
+        skipped = NotificationJob.objects.get(user__username="adrian")
+        self.assertEqual(skipped.status, NotificationJob.SKIPPED)
+        self.assertIsNone(skipped.locked_at)
+
+    @override_settings(NOTIFICATION_MAX_ATTEMPTS=2)
+    @mock.patch("changelogs.channels.SendGridAPIClient")
+    def test_give_up(self, sendgrid_client):
+        sendgrid_client.return_value.send.side_effect = Exception("Bad Request")
+        self._create_version()
+        for _ in range(2):
+            NotificationJob.objects.update(next_attempt_at=timezone.now())
+            call_command("send_notifications", stdout=StringIO())
+        self.assertEqual(
+            NotificationJob.objects.filter(status=NotificationJob.FAILED).count(), 2
+        )
+
+    def test_enqueue_once(self):
+        version = self._create_version()
+        self.assertEqual(NotificationJob.objects.count(), 2)
+        # another worker or ingestion path enqueues the same version
+        with self.assertNumQueries(3):
+            self.assertEqual(enqueue_notifications([version]), 0)
+        self.assertEqual(NotificationJob.objects.count(), 2)
+        self.assertEqual(
+            set(
+                NotificationDelivery.objects.values_list(
+                    "version_title", "user__username", "channel"
+                )
+            ),
+            {("1.0", "jacob", "email"), ("1.0", "adrian", "email")},
+        )
+
+    def test_refetch_deleted_version(self):
+        self._create_version().delete()
+        self.assertEqual(NotificationJob.objects.count(), 0)
+        ingest_versions(
+            self.project,
+            [
+                Version(
+                    title=title,
+                    date_time=timezone.now(),
+                    project=self.project,
+                    body="release",
+                )
+                for title in ("1.0", "2.0")
+            ],
+        )
+        self.assertEqual(
+            set(NotificationJob.objects.values_list("version__title", flat=True)),
+            {"2.0"},
+        )
+
+    def test_enqueue_missing(self):
+        Version.objects.bulk_create(
+            [
+                Version(
+                    title=title,
+                    date_time=timezone.now(),
+                    project=self.project,
+                    body="release",
+                )
+                for title in ("1.0", "2.0")
+            ]
+        )
+        self._create_version("3.0")
+        self.assertEqual(NotificationJob.objects.count(), 2)
+        out = StringIO()
+        call_command("enqueue_notifications", stdout=out)
+        self.assertIn("Successfully enqueued 4 release notifications", out.getvalue())
+        self.assertEqual(NotificationJob.objects.count(), 6)
+
+        call_command("enqueue_notifications", stdout=out)
+        self.assertIn("Successfully enqueued 0 release notifications", out.getvalue())
+        self.assertEqual(NotificationJob.objects.count(), 6)
+
+    @override_settings(NOTIFICATION_RECIPIENTS_PER_MESSAGE=2)
+    def test_batches(self):
+        self.project.subscribers.add(
+            User.objects.create_user(
+                username="simon", email="simon@mail.com", password="secret"
+            )
+        )
+        self._create_version("1.0")
+        self._create_version("1.1")
+        channel = InMemoryChannel()
+        with mock.patch(
+            "changelogs.notifications.render_message_html", wraps=render_message_html,
+        ) as render:
+            counts = send_notifications(channels={"email": channel})
+        self.assertEqual(counts, {NotificationJob.SENT: 6})
+        self.assertEqual(render.call_count, 2)
+        self.assertEqual(len(channel.notifications), 4)
+        recipients = sorted(
+            email
+            for notification in channel.notifications
+            if notification.subject == "django-1.0 released"
+            for email in notification.recipients
+        )
+        self.assertEqual(
+            recipients, ["adrian@mail.com", "jacob@mail.com", "simon@mail.com"]
+        )
+
+    def test_benchmark(self):
+        out = StringIO()
+        call_command(
+            "benchmark_notifications",
+            "--versions=2",
+            "--subscribers=5",
+            "--latency=0",
+            "--batch-size=2",
+            stdout=out,
+        )
+        for backend in ("memory", "file", "console"):
+            self.assertIn(f"{backend}: 10 notifications in", out.getvalue())
+        # the benchmark leaves nothing behind
+        self.assertFalse(Project.objects.filter(title="benchmark").exists())
+
+    @mock.patch("changelogs.channels.SendGridAPIClient")
+    def test_claim_stale_jobs(self, sendgrid_client):
+        self._create_version()
+        NotificationJob.objects.update(
+            status=NotificationJob.SENDING,
+            locked_at=timezone.now() - datetime.timedelta(hours=1),
+        )
+        call_command("send_notifications", stdout=StringIO())
+        self.assertEqual(
+            NotificationJob.objects.filter(status=NotificationJob.SENT).count(), 2
+        )
+
+
+@override_settings(
+    NOTIFICATION_CHANNELS={"email": {"BACKEND": "changelogs.channels.SendGridChannel"}},
+    SENDGRID_API_KEY="key",
+)
+class DigestTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username="owner", password="top_secret")
+        self.django = Project.objects.create(
+            title="django", url="https://github.com/django/django", owner=owner
+        )
+        self.flask = Project.objects.create(
+            title="flask", url="https://github.com/pallets/flask", owner=owner
+        )
+
+    def _create_user(self, username, frequency, projects):
+        user = User.objects.create_user(
+            username=username,
+            email=f"{username}@mail.com",
+            password="secret",
+            notification_frequency=frequency,
+        )
+        user.subscribers.add(*projects)
+        return user
+
+    def _create_versions(self, title):
+        for project in (self.django, self.flask):
+            Version.objects.create(
+                title=title, date_time=timezone.now(), project=project, body="release"
+            )
+
+    def test_digests(self):
+        self._create_user("jacob", User.IMMEDIATE, [self.django])
+        adrian = self._create_user("adrian", User.DAILY, [self.django, self.flask])
+        self._create_user("simon", User.WEEKLY, [self.django, self.flask])
+        self._create_user("armin", User.HOURLY, [self.flask])
+        self._create_versions("1.0")
+        self._create_versions("1.1")
+
+        channel = InMemoryChannel()
+        self.assertEqual(
+            send_notifications(channels={"email": channel}), {NotificationJob.SENT: 2}
+        )
+        self.assertEqual(len(channel.notifications), 2)
+
+        channels = {"email": InMemoryChannel()}
+        counts = send_digests(channels=channels)
+        self.assertEqual(counts, {"digests": 3, NotificationJob.SENT: 10})
+        # adrian and simon get the same digest
+        notifications = channels["email"].notifications
+        self.assertEqual(len(notifications), 2)
+        subjects = sorted(notification.subject for notification in notifications)
+        self.assertEqual(
+            subjects,
+            [
+                "2 new versions of your subscriptions",
+                "4 new versions of your subscriptions",
+            ],
+        )
+        adrian.refresh_from_db()
+        self.assertIsNotNone(adrian.last_digest_at)
+
+        # the next digests aren't due yet
+        self._create_versions("1.2")
+        self.assertEqual(send_digests(channels=channels), {})
+        User.objects.filter(username="armin").update(
+            last_digest_at=timezone.now() - datetime.timedelta(hours=2)
+        )
+        self.assertEqual(
+            send_digests(channels=channels), {"digests": 1, NotificationJob.SENT: 1}
+        )
+
+    def test_queries(self):
+        def send_digests_queries(users_count):
+            for i in range(users_count):
+                self._create_user(
+                    f"user{users_count}-{i}", User.DAILY, [self.django, self.flask]
+                )
+            self._create_versions(f"{users_count}.0")
+            with CaptureQueriesContext(connection) as queries:
+                counts = send_digests(
+                    chunk_size=100, channels={"email": InMemoryChannel()}
+                )
+            self.assertEqual(counts["digests"], users_count)
+            return len(queries)
+
+        self.assertEqual(send_digests_queries(2), send_digests_queries(20))
+
+    def test_command(self):
+        self._create_user("adrian", User.DAILY, [self.django])
+        self._create_versions("1.0")
+        out = StringIO()
+        with override_settings(
+            NOTIFICATION_CHANNELS={
+                "email": {"BACKEND": "changelogs.channels.InMemoryChannel"}
+            }
+        ):
+            call_command("send_digests", stdout=out)
+        self.assertIn("Successfully sent 1 digests: 1 sent", out.getvalue())
+
+
+class NotificationChannelsTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(
+            title="django",
+            url="https://github.com/django/django",
+            owner=User.objects.create_user(username="owner", password="top_secret"),
+        )
+        self.project.subscribers.add(
+            User.objects.create_user(
+                username="jacob", email="jacob@mail.com", password="secret"
+            )
+        )
+        self.version = Version(
+            title="3.0",
+            date_time=datetime.datetime(2019, 12, 2, tzinfo=pytz.utc),
+            project=self.project,
+            body="release",
+        )
+        self.notification = Notification(
+            subject="django-3.0 released",
+            html="<p>release</p>",
+            versions=[self.version],
+            recipients=["jacob@mail.com"],
+        )
+
+    @override_settings(
+        NOTIFICATION_CHANNELS={
+            "email": {"BACKEND": "changelogs.channels.InMemoryChannel"},
+            "slack": {
+                "BACKEND": "changelogs.channels.SlackChannel",
+                "OPTIONS": {"url": "https://hooks.slack.com/services/T/B/X"},
+                "BATCH_SIZE": 2,
+            },
+        },
+        NOTIFICATION_RECIPIENTS_PER_MESSAGE=2,
+    )
+    @mock.patch("changelogs.channels.client")
+    def test_enqueue_per_channel(self, client):
+        for i in range(4):
+            self.project.subscribers.add(
+                User.objects.create_user(
+                    username=f"user{i}", email=f"user{i}@mail.com", password="secret"
+                )
+            )
+        self.version.save()
+        self.assertEqual(
+            NotificationJob.objects.filter(channel="email").count(), 5,
+        )
+        # an event without recipients for the other channels
+        event = NotificationJob.objects.get(channel="slack")
+        self.assertIsNone(event.user)
+        self.assertEqual(enqueue_notifications([self.version]), 0)
+
+        channels = {"email": InMemoryChannel(), "slack": get_channel("slack")}
+        self.assertEqual(send_notifications(channels=channels), {"sent": 6})
+        self.assertEqual(len(channels["email"].notifications), 3)
+        client.post.assert_called_once()
+        self.assertNotIn("@mail.com", str(client.post.call_args))
+
+        # events are posted right away and aren't part of digests
+        User.objects.update(notification_frequency=User.DAILY)
+        self.version.pk = None
+        self.version.title = "3.1"
+        self.version.save()
+        self.assertEqual(send_notifications(channels=channels), {"sent": 1})
+        self.assertEqual(send_digests(channels=channels)["digests"], 5)
+        self.assertEqual(client.post.call_count, 2)
+
+    @override_settings(
+        NOTIFICATION_CHANNELS={
+            "webhook": {
+                "BACKEND": "changelogs.channels.WebhookChannel",
+                "OPTIONS": {"url": "https://example.com/hook"},
+            }
+        }
+    )
+    def test_event_without_e_mail_addresses(self):
+        User.objects.update(email="")
+        self.version.save()
+        self.assertEqual(
+            list(NotificationJob.objects.values_list("user", "channel")),
+            [(None, "webhook")],
+        )
+
+    def test_no_channels(self):
+        with override_settings(NOTIFICATION_CHANNELS={}):
+            self.version.save()
+        self.assertFalse(NotificationJob.objects.exists())
+        self.assertFalse(NotificationDelivery.objects.exists())
+
+    @override_settings(
+        NOTIFICATION_CHANNELS={
+            "webhook": {
+                "BACKEND": "changelogs.channels.WebhookChannel",
+                "OPTIONS": {"url": "https://example.com/hook"},
+                "WORKERS": 2,
+                "BATCH_SIZE": 10,
+            }
+        }
+    )
+    def test_get_channel(self):
+        channel = get_channel("webhook")
+        self.assertIsInstance(channel, WebhookChannel)
+        self.assertEqual(
+            (channel.url, channel.workers, channel.batch_size),
+            ("https://example.com/hook", 2, 10),
+        )
+        with self.assertRaises(ImproperlyConfigured):
+            get_channel("email")
+
+    @mock.patch("changelogs.channels.client")
+    def test_webhook(self, client):
+        WebhookChannel(url="https://example.com/hook").send(self.notification)
+        client.post.assert_called_once_with(
+            "https://example.com/hook",
+            json={
+                "subject": "django-3.0 released",
+                "versions": [
+                    {
+                        "project": "django",
+                        "project_url": "https://github.com/django/django",
+                        "title": "3.0",
+                        "date_time": "2019-12-02T00:00:00+00:00",
+                    }
+                ],
+                "html": "<p>release</p>",
+            },
+            retries=0,
+        )
+
+        client.post.return_value.raise_for_status.side_effect = requests.HTTPError(
+            "500 Server Error"
+        )
+        channel = SlackChannel(url="https://hooks.slack.com/services/T/B/X")
+        self.assertEqual(
+            channel.send_many([self.notification, self.notification]),
+            ["500 Server Error", "500 Server Error"],
+        )
+        self.assertEqual(
+            client.post.call_args[1]["json"],
+            {
+                "text": "*django-3.0 released*\n"
+                "• <https://github.com/django/django|django> 3.0"
+            },
+        )
+
+    def test_local_channels(self):
+        stream = StringIO()
+        ConsoleChannel(stream=stream).send(self.notification)
+        self.assertEqual(stream.getvalue(), "django-3.0 released to jacob@mail.com\n")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "notifications.jsonl")
+            channel = FileChannel(path, workers=4)
+            self.assertEqual(channel.send_many([self.notification] * 3), [None] * 3)
+            with open(path) as f:
+                lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[0]["recipients"], ["jacob@mail.com"])
+        self.assertEqual(lines[0]["versions"][0]["title"], "3.0")
@@ -0,0 +1,104 @@
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+
+from changelogs.models import Project, TimelineEntry, User, Version
+from changelogs.pagination import KeysetPage, paginate
+
+TIMELINE_BATCH_SIZE = 1000
+
+
+def is_timeline_enabled() -> bool:
+    return settings.FEED_MODE == "timeline"
+
+
+def fan_out_version(version: Version) -> None:
+    """
+    Adds the new version to the timelines of its project subscribers.
+    """
+    user_ids = version.project.subscribers.values_list("id", flat=True)
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                user_id=user_id,
+                version=version,
+                project_id=version.project_id,
+                date_time=version.date_time,
+            )
+            for user_id in user_ids
+        ],
+        batch_size=TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_ids: Iterable[int], project_ids: Iterable[int]) -> None:
+    """
+    Adds all the versions of the projects to the timelines of the users.
+    """
+    project_ids = list(project_ids)
+    versions = list(
+        Version.objects.filter(project_id__in=project_ids).values_list(
+            "id", "project_id", "date_time"
+        )
+    )
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                user_id=user_id,
+                version_id=version_id,
+                project_id=project_id,
+                date_time=date_time,
+            )
+            for user_id in user_ids
+            for version_id, project_id, date_time in versions
+        ],
+        batch_size=TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def prune(user_ids: Iterable[int], project_ids: Iterable[int]) -> None:
+    TimelineEntry.objects.filter(
+        user_id__in=list(user_ids), project_id__in=list(project_ids)
+    ).delete()
+
+
+def rebuild(users: Optional[Iterable[User]] = None) -> int:
+    """
+    Rebuilds the timelines of the given users (all of them by default) from
+    their subscriptions and returns the number of stored entries.
+    """
+    users = User.objects.all() if users is None else users
+    count = 0
+    for user in users:
+        TimelineEntry.objects.filter(user=user).delete()
+        project_ids = Project.objects.filter(subscribers=user).values_list(
+            "id", flat=True
+        )
+        backfill([user.id], project_ids)
+        count += TimelineEntry.objects.filter(user=user).count()
+    return count
+
+
+def timeline_page(user: User, cursor: Optional[str], page_size: int) -> KeysetPage:
+    """
+    Reads a feed page from the user's timeline: one range scan of the
+    timeline index and one primary key lookup of the versions.
+    """
+    page = paginate(
+        TimelineEntry.objects.filter(user=user).only("date_time", "version_id"),
+        cursor,
+        page_size,
+        id_field="version_id",
+    )
+    versions = Version.objects.for_cards().in_bulk(
+        [entry.version_id for entry in page.items]
+    )
+    items: List[Version] = [
+        versions[entry.version_id]
+        for entry in page.items
+        if entry.version_id in versions
+    ]
+    page.items = items
+    return page
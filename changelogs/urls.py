@@ -1,7 +1,7 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from . import views
+from . import feeds, views
 
 app_name = "changelogs"
 
@@ -12,8 +12,23 @@ router.register(r"versions", views.VersionViewSet)
 urlpatterns = [
     path("", views.IndexView.as_view(), name="index"),
     path("feed/", views.FeedView.as_view(), name="feed"),
+    path(
+        "feed/<str:token>/rss/",
+        feeds.conditional_user_feed(feeds.UserRssFeed()),
+        name="user_rss_feed",
+    ),
+    path(
+        "feed/<str:token>/atom/",
+        feeds.conditional_user_feed(feeds.UserAtomFeed()),
+        name="user_atom_feed",
+    ),
     path("profile/", views.ProfileView.as_view(), name="profile"),
     path("profile/edit", views.ProfileEditView.as_view(), name="edit_profile"),
+    path(
+        "profile/feed-token",
+        views.FeedTokenView.as_view(),
+        name="regenerate_feed_token",
+    ),
     path("about/", views.AboutView.as_view(), name="about"),
     path("subscriptions/", views.SubscriptionsView.as_view(), name="subscriptions",),
     path("projects/", views.ProjectsView.as_view(), name="projects"),
@@ -33,6 +48,21 @@ urlpatterns = [
         views.ProjectVersionsView.as_view(),
         name="project_versions",
     ),
+    path(
+        "projects/<int:project_id>/versions/page",
+        views.ProjectVersionsPageView.as_view(),
+        name="project_versions_page",
+    ),
+    path(
+        "projects/<int:project_id>/rss/",
+        feeds.conditional_project_feed(feeds.ProjectRssFeed()),
+        name="project_rss_feed",
+    ),
+    path(
+        "projects/<int:project_id>/atom/",
+        feeds.conditional_project_feed(feeds.ProjectAtomFeed()),
+        name="project_atom_feed",
+    ),
     path(
         "projects/<int:project_id>/versions/<int:version_id>/",
         views.VersionDetailView.as_view(),
@@ -43,6 +73,13 @@ urlpatterns = [
         views.AddVersionView.as_view(),
         name="add_version",
     ),
+    path("webhooks/github/", views.GithubWebhookView.as_view(), name="github_webhook",),
+    path("webhooks/gitlab/", views.GitlabWebhookView.as_view(), name="gitlab_webhook",),
+    path(
+        "api/projects/<int:project_id>/export/<str:export_format>/",
+        views.ProjectExportView.as_view(),
+        name="project_export",
+    ),
     path("api/", include(router.urls)),
     path("api-auth/", include("rest_framework.urls", namespace="rest_framework")),
     path(
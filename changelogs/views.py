@@ -1,16 +1,44 @@
 import datetime
+import hashlib
+import hmac
+import json
+from typing import List
 
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponse, HttpResponseRedirect
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404
 from django.template import loader
 from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+from django.utils.dateparse import parse_datetime
+from django.utils.decorators import method_decorator
+from django.utils.text import slugify
 from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import viewsets
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework.views import APIView
 
+from changelogs.export import CONTENT_TYPES, export_versions, gzip_chunks
 from changelogs.forms import ProjectForm, UserForm, VersionForm
+from changelogs.http_cache import project_versions_state, render_conditionally
 from changelogs.models import Project, Version
+from changelogs.pagination import InvalidCursor, decode_cursor, paginate
 from changelogs.serializers import ProjectSerializer, VersionSerializer
+from changelogs.services import (
+    ingest_github_release_event,
+    ingest_gitlab_release_event,
+)
+from changelogs.timeline import is_timeline_enabled, timeline_page
 
 
 class IndexView(View):
@@ -24,12 +52,20 @@ class FeedView(View):
     def get(self, request):
         template = loader.get_template("changelogs/feed.html")
 
-        if request.user.is_authenticated:
-            versions = Version.objects.filter(project__subscribers=request.user).all()
-        else:
-            versions = Version.objects.filter(project__is_public=True).all()
-
-        context = {"versions": versions}
+        cursor = request.GET.get("before")
+        try:
+            if request.user.is_authenticated and is_timeline_enabled():
+                page = timeline_page(request.user, cursor, settings.FEED_PAGE_SIZE)
+            else:
+                if request.user.is_authenticated:
+                    versions = Version.objects.filter(project__subscribers=request.user)
+                else:
+                    versions = Version.objects.filter(project__is_public=True)
+                page = paginate(versions.for_cards(), cursor, settings.FEED_PAGE_SIZE)
+        except InvalidCursor:
+            return HttpResponseBadRequest("Invalid cursor")
+
+        context = {"versions": page.items, "page": page}
         return HttpResponse(template.render(context, request))
 
 
@@ -70,8 +106,16 @@ class ProjectDetailView(View):
             project = get_object_or_404(
                 Project.objects.accessible_by_user(request.user), pk=project_id
             )
-        context = {"project": project}
-        return HttpResponse(template.render(context, request))
+        latest_versions = project.versions.only("title", "date_time", "project_id")
+        context = {"project": project, "latest_versions": latest_versions[:5]}
+        versions_updated_at, versions_count = project_versions_state(project)
+        return render_conditionally(
+            request,
+            project,
+            versions_updated_at,
+            (versions_updated_at, versions_count),
+            lambda: HttpResponse(template.render(context, request)),
+        )
 
 
 class ProjectEditView(View):
@@ -96,11 +140,51 @@ class ProjectEditView(View):
 
 
 class ProjectVersionsView(View):
+    template_name = "changelogs/project_versions.html"
+
     def get(self, request, project_id: int):
-        template = loader.get_template("changelogs/project_versions.html")
-        project = get_object_or_404(Project, pk=project_id)
-        context = {"project": project}
-        return HttpResponse(template.render(context, request))
+        template = loader.get_template(self.template_name)
+        if request.user.is_anonymous:
+            project = get_object_or_404(
+                Project.objects.filter(is_public=True), pk=project_id
+            )
+        else:
+            project = get_object_or_404(
+                Project.objects.accessible_by_user(request.user), pk=project_id
+            )
+        cursor = request.GET.get("before")
+        try:
+            if cursor:
+                decode_cursor(cursor)
+        except InvalidCursor:
+            return HttpResponseBadRequest("Invalid cursor")
+
+        # the page is only loaded when the client doesn't have it already
+        def render():
+            page = paginate(
+                project.versions.for_cards(),
+                cursor,
+                settings.PROJECT_VERSIONS_PAGE_SIZE,
+            )
+            context = {"project": project, "versions": page.items, "page": page}
+            return HttpResponse(template.render(context, request))
+
+        versions_updated_at, versions_count = project_versions_state(project)
+        return render_conditionally(
+            request,
+            project,
+            versions_updated_at,
+            (versions_updated_at, versions_count),
+            render,
+        )
+
+
+class ProjectVersionsPageView(ProjectVersionsView):
+    """
+    The next page of project versions as an HTML fragment, loaded on scroll.
+    """
+
+    template_name = "changelogs/_project_versions_page.html"
 
 
 class VersionDetailView(View):
@@ -114,11 +198,15 @@ class VersionDetailView(View):
             project = get_object_or_404(
                 Project.objects.accessible_by_user(request.user), pk=project_id
             )
-        version = get_object_or_404(
-            Version.objects.filter(project=project), pk=version_id
-        )
+        version = get_object_or_404(project.versions.for_cards(), pk=version_id)
         context = {"version": version}
-        return HttpResponse(template.render(context, request))
+        return render_conditionally(
+            request,
+            project,
+            version.updated_at,
+            (version.updated_at,),
+            lambda: HttpResponse(template.render(context, request)),
+        )
 
 
 class ProfileView(LoginRequiredMixin, View):
@@ -128,6 +216,17 @@ class ProfileView(LoginRequiredMixin, View):
         return HttpResponse(template.render(context, request))
 
 
+class FeedTokenView(LoginRequiredMixin, View):
+    """
+    Replaces the token in the links to the user's feeds, e.g. after they
+    leaked.
+    """
+
+    def post(self, request):
+        request.user.regenerate_feed_token()
+        return HttpResponseRedirect(reverse("changelogs:profile"))
+
+
 class ProfileEditView(LoginRequiredMixin, View):
     def get(self, request):
         template = loader.get_template("changelogs/edit_profile.html")
@@ -190,6 +289,11 @@ class AddVersionView(LoginRequiredMixin, View):
         template = loader.get_template("changelogs/add_version.html")
 
         form = VersionForm(request.POST)
+        if (
+            form.is_valid()
+            and project.versions.filter(title=form.instance.title).exists()
+        ):
+            form.add_error("title", "Version with this title already exists.")
         if form.is_valid():
             version = form.instance
             version.date_time = datetime.datetime.now()
@@ -237,6 +341,54 @@ class SubscriptionsView(LoginRequiredMixin, View):
         return HttpResponseRedirect(reverse("changelogs:subscriptions"))
 
 
+@method_decorator(csrf_exempt, name="dispatch")
+class GithubWebhookView(View):
+    def post(self, request):
+        secret = settings.GITHUB_WEBHOOK_SECRET
+        signature = (
+            "sha256="
+            + hmac.new(secret.encode(), request.body, hashlib.sha256).hexdigest()
+        )
+        if not secret or not hmac.compare_digest(
+            signature, request.headers.get("X-Hub-Signature-256", "")
+        ):
+            return HttpResponseForbidden("Wrong signature")
+
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            return HttpResponseBadRequest("Wrong payload")
+
+        if (
+            request.headers.get("X-GitHub-Event") != "release"
+            or payload.get("action") != "published"
+        ):
+            return JsonResponse({"created": 0})
+        return JsonResponse({"created": len(ingest_github_release_event(payload))})
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class GitlabWebhookView(View):
+    def post(self, request):
+        token = settings.GITLAB_WEBHOOK_TOKEN
+        if not token or not hmac.compare_digest(
+            token, request.headers.get("X-Gitlab-Token", "")
+        ):
+            return HttpResponseForbidden("Wrong token")
+
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            return HttpResponseBadRequest("Wrong payload")
+
+        if (
+            request.headers.get("X-Gitlab-Event") != "Release Hook"
+            or payload.get("action") != "create"
+        ):
+            return JsonResponse({"created": 0})
+        return JsonResponse({"created": len(ingest_gitlab_release_event(payload))})
+
+
 class ProjectViewSet(viewsets.ModelViewSet):
     """
     API endpoint that allows projects to be viewed or edited.
@@ -253,3 +405,47 @@ class VersionViewSet(viewsets.ModelViewSet):
 
     queryset = Version.objects.all()
     serializer_class = VersionSerializer
+
+
+class ProjectExportView(APIView):
+    """
+    API endpoint that streams the whole changelog of a project as Markdown,
+    JSON or NDJSON, gzipped when the client accepts it.
+    """
+
+    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    permission_classes: List = []
+
+    def get(self, request, project_id: int, export_format: str):
+        if request.user.is_anonymous:
+            projects = Project.objects.filter(is_public=True)
+        else:
+            projects = Project.objects.accessible_by_user(request.user)
+        project = get_object_or_404(projects, pk=project_id)
+        if export_format not in CONTENT_TYPES:
+            raise Http404(f"Unknown export format {export_format}")
+
+        since = None
+        if request.GET.get("since"):
+            try:
+                since = parse_datetime(request.GET["since"])
+            except ValueError:
+                since = None
+            if since is None:
+                return HttpResponseBadRequest("Invalid since")
+
+        chunks = export_versions(project, export_format, since)
+        if "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", ""):
+            response = StreamingHttpResponse(
+                gzip_chunks(chunks), content_type=CONTENT_TYPES[export_format]
+            )
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = StreamingHttpResponse(
+                chunks, content_type=CONTENT_TYPES[export_format]
+            )
+        patch_vary_headers(response, ["Accept-Encoding"])
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="{slugify(project.title)}.{export_format}"'
+        return response